@@ -2,7 +2,9 @@
 from discord.ext import commands
 from bot.utils.database import Database
 import logging
-from bot.utils.config import get_gemini_model, get_prompt_tone
+from bot.utils.config import LLM_STREAMING, get_prompt_tone
+from bot.utils.llm import get_llm_service
+from bot.utils.streaming import ProgressiveEditor
 from bot.utils.pagination import chunk_lines_to_pages, SimplePaginator
 import discord
 from discord import app_commands
@@ -14,20 +16,23 @@ from bot.utils import words as words_util
 from bot.utils.prompts import build_kaisetu_prompt, build_bunshou_prompt
 from bot.utils.review import ReviewSession, start_quiz_session, quiz_memorized, quiz_forgot, quiz_stop
 from bot.utils import stats as stats_util
+from bot.utils import explain_cache
+from bot.utils import activity
+from bot.utils.sampling import weighted_sample
 
 
 class Commands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.model = get_gemini_model()
+        self.llm = get_llm_service()
+
+    async def cog_unload(self):
+        # 復習の回答はバッファしてまとめて書き込むので、残りをここで書き出す
+        await stats_util.get_stats_buffer().flush()
 
     # ---------- Helpers ----------
     async def _build_show_pages(self, user_id: int) -> Optional[List[str]]:
-        db = await Database.get_instance()
-        rows = await db.fetchall(
-            "SELECT id, word, meaning FROM words WHERE user_id = ? ORDER BY id ASC",
-            (user_id,),
-        )
+        rows = await words_util.fetch_user_words(user_id)
         if not rows:
             return None
         header = "お兄ちゃんの登録した単語一覧だよ！:\n"
@@ -35,6 +40,13 @@ class Commands(commands.Cog):
         pages = chunk_lines_to_pages(lines, max_chars=1900)
         return [header + p for p in pages]
 
+    def _make_editor(self, interaction: discord.Interaction) -> ProgressiveEditor:
+        # 生成途中の文章で「考え中…」の応答を少しずつ書き換える
+        return ProgressiveEditor(
+            edit=interaction.edit_original_response,
+            send=lambda content: interaction.followup.send(content, ephemeral=False),
+        )
+
     async def _edit_word_impl(self, user_id: int, word_id: int, new_word: Optional[str], new_meaning: Optional[str]) -> str:
         db = await Database.get_instance()
         row = await db.fetchone("SELECT user_id FROM words WHERE id = ?", (word_id,))
@@ -42,10 +54,12 @@ class Commands(commands.Cog):
             return "えっと、お兄ちゃん...そのIDの単語見つからないよ？ (´・ω・｀)"
         if row[0] != user_id:
             return "ごめんね、お兄ちゃんじゃその単語編集できないみたい... (>_<)"
-        if new_word:
-            await db.execute("UPDATE words SET word = ? WHERE id = ?", (new_word, word_id))
-        if new_meaning:
-            await db.execute("UPDATE words SET meaning = ? WHERE id = ?", (new_meaning, word_id))
+        async with db.transaction():
+            if new_word:
+                await db.execute("UPDATE words SET word = ? WHERE id = ?", (new_word, word_id))
+            if new_meaning:
+                await db.execute("UPDATE words SET meaning = ? WHERE id = ?", (new_meaning, word_id))
+        words_util.invalidate_user(user_id)
         return "単語更新かんりょー！"
 
     async def _delete_words_impl(self, user_id: int, words: str) -> Optional[str]:
@@ -56,19 +70,23 @@ class Commands(commands.Cog):
         db = await Database.get_instance()
         deleted_results = []
         not_found = []
-        for word in word_list:
-            rows = await db.fetchall(
-                "SELECT id, word, meaning FROM words WHERE user_id = ? AND word = ?",
-                (user_id, word),
-            )
-            if rows:
-                await db.execute(
-                    "DELETE FROM words WHERE user_id = ? AND word = ?",
+        async with db.transaction():
+            for word in word_list:
+                rows = await db.fetchall(
+                    "SELECT id, word, meaning FROM words WHERE user_id = ? AND word = ?",
                     (user_id, word),
                 )
-                deleted_results.extend(rows)
-            else:
-                not_found.append(word)
+                if rows:
+                    await db.execute(
+                        "DELETE FROM words WHERE user_id = ? AND word = ?",
+                        (user_id, word),
+                    )
+                    await activity.record_removed(user_id, len(rows))
+                    deleted_results.extend(rows)
+                else:
+                    not_found.append(word)
+        if deleted_results:
+            words_util.invalidate_user(user_id)
         response = []
         if deleted_results:
             deleted_words = "\n".join([f"**英語:** {r[1]} | **意味:** {r[2]}" for r in deleted_results])
@@ -77,32 +95,46 @@ class Commands(commands.Cog):
             response.append(f"この単語は見つからなかったよ: {', '.join(not_found)}")
         return "\n\n".join(response) if response else ""
 
-    async def _kaisetu_impl(self, word: str) -> Optional[str]:
-        if not self.model:
+    async def _kaisetu_impl(self, word: str, editor: Optional[ProgressiveEditor] = None) -> Optional[str]:
+        if not self.llm.available:
             return None
-        prompt = build_kaisetu_prompt(word, tone=get_prompt_tone())
+        tone = get_prompt_tone()
+        try:
+            cached = await explain_cache.get(word, tone, self.llm.model_name)
+        except Exception as e:
+            logging.warning(f"kaisetu cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+        prompt = build_kaisetu_prompt(word, tone=tone)
+        key = explain_cache.cache_key(word, tone, self.llm.model_name)
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            # 同じ単語への同時リクエストは1回の生成にまとめる
+            if editor is not None:
+                text = await editor.consume(self.llm.stream(prompt, key=key))
+            else:
+                text = await self.llm.generate(prompt, key=key)
         except Exception as e:
             logging.error(f"Error in kaisetu: {e}")
             return "ごめんね、お兄ちゃん。なんかうまくいかないみたい（´；ω；｀）"
+        try:
+            await explain_cache.put(word, tone, self.llm.model_name, text)
+        except Exception as e:
+            logging.warning(f"kaisetu cache store failed: {e}")
+        return text
 
-    async def _bunshou_impl(self, user_id: int, style: Optional[str]) -> Optional[str]:
-        if not self.model:
+    async def _bunshou_impl(self, user_id: int, style: Optional[str], editor: Optional[ProgressiveEditor] = None) -> Optional[str]:
+        if not self.llm.available:
             return None
-        db = await Database.get_instance()
-        rows = await db.fetchall(
-            "SELECT word, meaning FROM words WHERE user_id = ?",
-            (user_id,),
-        )
+        rows = [(w, m) for (_, w, m, _) in await words_util.fetch_user_words(user_id)]
         if not rows:
             return "お兄ちゃん、まだ単語登録してないみたい... (・_・;)"
         selected_rows = random.sample(rows, min(15, len(rows)))
         prompt = build_bunshou_prompt(selected_rows, style, tone=get_prompt_tone())
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            if editor is not None:
+                return await editor.consume(self.llm.stream(prompt))
+            return await self.llm.generate(prompt)
         except Exception as e:
             logging.error(f"Error in bunshou: {e}")
             return "ごめんね、お兄ちゃん。なんかうまくいかないみたい（´；ω；｀）"
@@ -119,14 +151,16 @@ class Commands(commands.Cog):
         if row[0] != ctx.author.id:
             await ctx.send("ごめんね、お兄ちゃんじゃその単語編集できないみたい... (>_<)")
             return
-        if new_word:
-            await db.execute(
-                "UPDATE words SET word = ? WHERE id = ?", (new_word, word_id)
-            )
-        if new_meaning:
-            await db.execute(
-                "UPDATE words SET meaning = ? WHERE id = ?", (new_meaning, word_id)
-            )
+        async with db.transaction():
+            if new_word:
+                await db.execute(
+                    "UPDATE words SET word = ? WHERE id = ?", (new_word, word_id)
+                )
+            if new_meaning:
+                await db.execute(
+                    "UPDATE words SET meaning = ? WHERE id = ?", (new_meaning, word_id)
+                )
+        words_util.invalidate_user(ctx.author.id)
         await ctx.send("単語更新かんりょー！")
 
     @commands.command()
@@ -203,25 +237,51 @@ class Commands(commands.Cog):
     # Slash: kaisetu (Gemini)
     @app_commands.command(name="kaisetu", description="英単語の解説をするよ！(Gemini)")
     async def slash_kaisetu(self, interaction: discord.Interaction, word: str):
-        if not self.model:
+        if not self.llm.available:
             await interaction.response.send_message(
                 "ごめんね、お兄ちゃん。今は解説機能が使えないみたい…(>_<)", ephemeral=True
             )
             return
         await interaction.response.defer(thinking=True)
+        if LLM_STREAMING:
+            editor = self._make_editor(interaction)
+            text = await self._kaisetu_impl(word, editor=editor)
+            await editor.finish(text or "うまくいかなかったみたい…")
+            return
         text = await self._kaisetu_impl(word)
         await interaction.followup.send(text or "うまくいかなかったみたい…", ephemeral=False)
 
+    # Slash: LLM/cache counters (admin)
+    @app_commands.command(name="llm_stats", description="(Admin) Gemini呼び出しとキャッシュの統計を表示するよ！")
+    async def slash_llm_stats(self, interaction: discord.Interaction):
+        if interaction.guild and not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("管理者だけが使えるコマンドだよ！", ephemeral=True)
+            return
+        llm = self.llm.stats()
+        cache = explain_cache.stats()
+        msg = (
+            "Gemini呼び出しの統計だよ！\n"
+            f"・リクエスト: {llm['requests']} / 実生成: {llm['generations']} / 合流: {llm['coalesced']} / 実行中: {llm['inflight']}\n"
+            f"・失敗: {llm['failures']} / タイムアウト: {llm['timeouts']}\n"
+            f"・解説キャッシュ: メモリ {cache['memory_hits']} / DB {cache['db_hits']} / ミス {cache['misses']}（メモリ内 {cache['memory_size']}件）"
+        )
+        await interaction.response.send_message(msg, ephemeral=True)
+
     # Slash: bunshou (Gemini)
     @app_commands.command(name="bunshou", description="登録単語で文章を生成するよ！(Gemini)")
     @app_commands.describe(style="スタイル (例: ビジネス風)")
     async def slash_bunshou(self, interaction: discord.Interaction, style: Optional[str] = None):
-        if not self.model:
+        if not self.llm.available:
             await interaction.response.send_message(
                 "ごめんね、お兄ちゃん。今は文章生成が使えないみたい…(>_<)", ephemeral=True
             )
             return
         await interaction.response.defer(thinking=True)
+        if LLM_STREAMING:
+            editor = self._make_editor(interaction)
+            text = await self._bunshou_impl(interaction.user.id, style, editor=editor)
+            await editor.finish(text or "うまくいかなかったみたい…")
+            return
         text = await self._bunshou_impl(interaction.user.id, style)
         await interaction.followup.send(text or "うまくいかなかったみたい…", ephemeral=False)
 
@@ -234,7 +294,7 @@ class Commands(commands.Cog):
             await interaction.response.send_message("お兄ちゃん、まだ単語登録してないみたい…まずは /add で登録してね！", ephemeral=True)
             return
         now = datetime.now(self.bot.JST)
-        due = words_util.compute_due_today(rows, now)
+        due = await words_util.fetch_due_words(user_id, now)
         if count is None:
             # All due words
             items = due
@@ -275,11 +335,11 @@ class Commands(commands.Cog):
     # Internal: quiz (random pool weighted)
     async def _start_quiz(self, interaction: discord.Interaction, count: Optional[int] = 5, bias: Optional[float] = 1.0):
         user_id = interaction.user.id
-        rows = await words_util.fetch_user_words(user_id)
-        if not rows:
+        # Words and their per-word difficulty stats in one query
+        pool, stats_map = await stats_util.fetch_words_with_stats(user_id)
+        if not pool:
             await interaction.response.send_message("お兄ちゃん、まだ単語登録してないみたい…まずは /add で登録してね！", ephemeral=True)
             return
-        pool = [(r[0], r[1], r[2]) for r in rows]
         n = max(1, min(count or 5, 20))
         b = bias if bias is not None else 1.0
         try:
@@ -292,32 +352,8 @@ class Commands(commands.Cog):
         user = interaction.user
         channel = interaction.channel if is_dm else (user.dm_channel or await user.create_dm())
         # Weight selection by per-word difficulty stats (harder words appear more)
-        stats_map = await stats_util.fetch_stats_map(rows)
-        def weight_of(item):
-            wid = item[0]
-            attempts, corrects, ease = stats_map.get(wid, (0, 0, 2.5))
-            acc = (corrects / attempts) if attempts else 0.0
-            # Higher weight for lower accuracy and lower ease; scaled by bias
-            return 1.0 + b * (attempts * (1.0 - acc) + (3.0 - ease))
-
-        weights = [weight_of(it) for it in pool]
-        # Sample without replacement using weights
-        import random
-        selected = []
-        items = pool[:]
-        ws = weights[:]
-        for _ in range(min(n, len(items))):
-            total_w = sum(ws)
-            r = random.random() * total_w
-            upto = 0.0
-            idx = 0
-            for i, w in enumerate(ws):
-                upto += w
-                if r <= upto:
-                    idx = i
-                    break
-            selected.append(items.pop(idx))
-            ws.pop(idx)
+        weights = [stats_util.difficulty_weight(stats_map.get(wid), b) for (wid, _, _) in pool]
+        selected = weighted_sample(pool, weights, n)
 
         view = ReviewSession(user_id, selected)
         try:
@@ -349,7 +385,7 @@ class Commands(commands.Cog):
     @app_commands.describe(word="英単語", meaning="意味")
     async def slash_add(self, interaction: discord.Interaction, word: str, meaning: str):
         now = datetime.now(self.bot.JST)
-        count = await words_util.insert_pairs(interaction.user.id, [(word.strip(), meaning.strip())], now)
+        await words_util.insert_pairs(interaction.user.id, [(word.strip(), meaning.strip())], now)
         await interaction.response.send_message(
             f"{interaction.user.mention} 単語を登録したよ！\n**英語:** {word} | **意味:** {meaning}",
             ephemeral=False,
@@ -367,7 +403,7 @@ class Commands(commands.Cog):
             )
             return
         now = datetime.now(self.bot.JST)
-        count = await words_util.insert_pairs(interaction.user.id, parsed, now)
+        count = len(await words_util.insert_pairs(interaction.user.id, parsed, now))
         preview = "\n".join([f"**英語:** {w} | **意味:** {m}" for (w, m) in parsed[:10]])
         more = "\n…" if len(parsed) > 10 else ""
         await interaction.response.send_message(
@@ -380,7 +416,7 @@ class Commands(commands.Cog):
     # Slash: progress
     @app_commands.command(name="progress", description="進捗を表示するよ！")
     async def slash_progress(self, interaction: discord.Interaction):
-        rows = await words_util.fetch_user_words(interaction.user.id)
+        rows = await words_util.fetch_schedule_rows(interaction.user.id)
         now = datetime.now(self.bot.JST)
         stats = words_util.compute_progress(rows, now)
         total = stats["total"]
@@ -444,20 +480,24 @@ class Commands(commands.Cog):
         deleted_results = []
         not_found = []
 
-        for word in word_list:
-            rows = await db.fetchall(
-                "SELECT id, word, meaning FROM words WHERE user_id = ? AND word = ?",
-                (ctx.author.id, word),
-            )
-            
-            if rows:
-                await db.execute(
-                    "DELETE FROM words WHERE user_id = ? AND word = ?",
+        async with db.transaction():
+            for word in word_list:
+                rows = await db.fetchall(
+                    "SELECT id, word, meaning FROM words WHERE user_id = ? AND word = ?",
                     (ctx.author.id, word),
                 )
-                deleted_results.extend(rows)
-            else:
-                not_found.append(word)
+
+                if rows:
+                    await db.execute(
+                        "DELETE FROM words WHERE user_id = ? AND word = ?",
+                        (ctx.author.id, word),
+                    )
+                    await activity.record_removed(ctx.author.id, len(rows))
+                    deleted_results.extend(rows)
+                else:
+                    not_found.append(word)
+        if deleted_results:
+            words_util.invalidate_user(ctx.author.id)
 
         # 結果メッセージの作成
         response = []
@@ -493,42 +533,12 @@ class Commands(commands.Cog):
         使用方法:
         !kaisetu <英単語>
         """
-        if not self.model:
+        if not self.llm.available:
             await ctx.send("ごめんね、お兄ちゃん。今は解説機能が使えないみたい…(>_<)")
             return
-        try:
-            # Google AI APIを使用して解説を生成
-            response = self.model.generate_content(
-                f"""
-                日本語で出力してください。
-                あなたは日本のアニメの妹キャラです。その話し方を完全にコピーしてください。
-                返事の例は次の通りです。
-                「おはよ！」
-                「おにーちゃん、今日もはりきっていこう！」
-                「えー！そんなぁー(´;ω;｀)」
-                「もぉー！知らない！」
-                試しにこの妹キャラになりきったうえで、次の英単語に関する文法的、意味的解説を英語の例文とともに簡潔にしてください。
-                {word}
-
-                書き出しの例を以下に示すので、これに似た書き出しをしてください。
-                この単語はねー
-                この単語の意味はね！
-                ほほーう、これはなかなか乙な単語だねぇ～（この表現を使うときは単語の難易度に関する率直な印象を「乙」以外にも「難しい」、「いい感じ」などのような表現を自分で考えたうえで付け加えてください）
-                うーんと、これはね
-                そうだね～
-                
-
-                注意事項
-                「///」のようなスラッシュは使用しないでください。
-                *や#のようなマークダウンの記法は用いないでください
-                単語、その意味、例文以外にカッコ「」は用いないでください
-                """
-            )
-            
-            await ctx.send(response.text)
-        except Exception as e:
-            logging.error(f"Error in kaisetu command: {e}")
-            await ctx.send("ごめんね、お兄ちゃん。なんかうまくいかないみたい（´；ω；｀）")
+        # スラッシュ版と同じプロンプト・キャッシュを共有する
+        text = await self._kaisetu_impl(word)
+        await ctx.send(text or "うまくいかなかったみたい…")
 
     @commands.command()
     async def bunshou(self, ctx, *, style: str = None):
@@ -542,17 +552,14 @@ class Commands(commands.Cog):
         !bunshou ビジネス風
         !bunshou
         """
-        db = await Database.get_instance()
-        # すべての単語を取得
-        rows = await db.fetchall(
-            "SELECT word, meaning FROM words WHERE user_id = ?", (ctx.author.id,)
-        )
+        # すべての単語を取得（キャッシュ経由）
+        rows = [(w, m) for (_, w, m, _) in await words_util.fetch_user_words(ctx.author.id)]
 
         if not rows:
             await ctx.send("お兄ちゃん、まだ単語登録してないみたい... (・_・;)")
             return
 
-        if not self.model:
+        if not self.llm.available:
             await ctx.send("ごめんね、お兄ちゃん。今は文章生成が使えないみたい…(>_<)")
             return
         try:
@@ -618,8 +625,8 @@ class Commands(commands.Cog):
             formatted_prompt = prompt.format(style_text=style_text, word_list=word_list)
 
             # gemini APIを使用して文章を生成
-            response = self.model.generate_content(formatted_prompt)
-            await ctx.send(response.text)
+            text = await self.llm.generate(formatted_prompt)
+            await ctx.send(text)
         except Exception as e:
             logging.error(f"bunshoコマンドでエラーが発生しました: {e}")
             await ctx.send("ごめんね、お兄ちゃん。なんかうまくいかないみたい（´；ω；｀）")
@@ -629,7 +636,7 @@ class Commands(commands.Cog):
     # Prefix: progress
     @commands.command(name="progress")
     async def cmd_progress(self, ctx):
-        rows = await words_util.fetch_user_words(ctx.author.id)
+        rows = await words_util.fetch_schedule_rows(ctx.author.id)
         now = datetime.now(self.bot.JST)
         stats = words_util.compute_progress(rows, now)
         total = stats["total"]
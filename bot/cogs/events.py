@@ -5,17 +5,21 @@ import re
 from datetime import datetime
 from bot.utils.database import Database
 import logging
-from bot.utils.config import get_gemini_model, get_prompt_tone
+from bot.utils.config import get_prompt_tone
+from bot.utils.llm import get_llm_service
 from bot.utils.prompts import build_reply_prompt
 from bot.utils import words as words_util
 from bot.utils import stats as stats_util
+from bot.utils import activity
+from bot.utils import dm_channels
+from bot.utils.sampling import weighted_sample
 from bot.utils.review import start_quiz_session
 
 class Events(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = None
-        self.model = get_gemini_model()  # Gemini モデル（無効時は None）
+        self.llm = get_llm_service()  # Gemini 実行レイヤー（無効時は available=False）
         self._synced = False
 
     @commands.Cog.listener()
@@ -52,6 +56,12 @@ class Events(commands.Cog):
 
         # DM内のクイズ 起動/操作（テキスト）
         if message.guild is None:
+            # A DM from the user tells us their DM channel for free; reminders reuse it.
+            # Best effort: a busy or failing DB must not break normal DM handling.
+            try:
+                await dm_channels.put(message.author.id, message.channel.id)
+            except Exception as e:
+                logging.error(f"Failed to remember DM channel for {message.author.id}: {e}")
             cmd = message.content.strip()
             # 起動: クイズ [n]
             import re as _re
@@ -68,15 +78,18 @@ class Events(commands.Cog):
                 except Exception:
                     n = None if m_review else 5
                 try:
-                    # Build pool
-                    rows = await words_util.fetch_user_words(message.author.id)
-                    if not rows:
+                    # Build pool（統計が要るのはクイズだけ）
+                    if m_review:
+                        rows = await words_util.fetch_user_words(message.author.id)
+                        pool = [(r[0], r[1], r[2]) for r in rows]
+                    else:
+                        pool, stats_map = await stats_util.fetch_words_with_stats(message.author.id)
+                    if not pool:
                         await message.channel.send("まだ単語が登録されていないみたい… /add で登録してね！")
                         return
-                    pool = [(r[0], r[1], r[2]) for r in rows]
                     if m_review:
                         now = datetime.now(self.bot.JST)
-                        due = words_util.compute_due_today(rows, now)
+                        due = await words_util.fetch_due_words(message.author.id, now)
                         items = due if (n is None) else due[:n]
                         if not items:
                             import random as _rand
@@ -103,27 +116,8 @@ class Events(commands.Cog):
                             except Exception:
                                 b = 1.0
                         b = max(0.0, min(3.0, b))
-                    stats_map = await stats_util.fetch_stats_map(rows)
-                    def weight_of(item):
-                        wid = item[0]
-                        attempts, corrects, ease = stats_map.get(wid, (0, 0, 2.5))
-                        acc = (corrects / attempts) if attempts else 0.0
-                        return 1.0 + b * (attempts * (1.0 - acc) + (3.0 - ease))
-                    weights = [weight_of(it) for it in pool]
-                    import random as _rand
-                    selected, items_cpy, ws = [], pool[:], weights[:]
-                    for _ in range(min(n, len(items_cpy))):
-                        tw = sum(ws)
-                        r = _rand.random() * tw
-                        up = 0.0
-                        idx = 0
-                        for i, w in enumerate(ws):
-                            up += w
-                            if r <= up:
-                                idx = i
-                                break
-                        selected.append(items_cpy.pop(idx))
-                        ws.pop(idx)
+                    weights = [stats_util.difficulty_weight(stats_map.get(wid), b) for (wid, _, _) in pool]
+                    selected = weighted_sample(pool, weights, n)
                     from bot.utils.review import ReviewSession
                     view = ReviewSession(message.author.id, selected)
                     await message.channel.send("クイズ行くよ！\n" + view.current_prompt(), view=view)
@@ -140,12 +134,12 @@ class Events(commands.Cog):
                     # logging.info(f"Received reply from non-bot user: {replied_message.author.name} {replied_message.content}")
                     return
                 
-                if not self.model:
+                if not self.llm.available:
                     # Gemini 無効時はスルー（静かに）
                     return
                 prompt = build_reply_prompt(replied_message.content, message.content, tone=get_prompt_tone())
-                response = self.model.generate_content(prompt)
-                await message.reply(response.text)
+                text = await self.llm.generate(prompt)
+                await message.reply(text)
 
             except Exception as e:
                 logging.error(f"Error in on_message event (reply): {e}")
@@ -168,47 +162,46 @@ class Events(commands.Cog):
             inserted_entries = []  # (id, word, meaning)
             updated_entries = []   # (id, word, old_meaning, new_meaning)
             recent_items = []      # (id, word, meaning) for quick edit
-            for line in lines:
-                match = re.match(r"^(.*?)[:，,、\s]+(.+)$", line)
-                if not match:
-                    logging.warning(f"Line '{line}' does not match the expected format.")
-                    continue
-                english_word = match.group(1).strip()
-                japanese_meaning = match.group(2).strip()
-                # Check if word exists for this user
-                existing = await self.db.fetchone(
-                    "SELECT id, meaning FROM words WHERE user_id = ? AND word = ?",
-                    (message.author.id, english_word),
-                )
-                if existing:
-                    word_id, old_meaning = existing
-                    # Update meaning
-                    await self.db.execute(
-                        "UPDATE words SET meaning = ? WHERE id = ?",
-                        (japanese_meaning, word_id),
+            new_pairs = []         # (word, meaning) to insert in one batch
+            pending_index = {}     # word -> index in new_pairs (same word twice in one message)
+            # 複数行の登録は1トランザクション（コミット1回）にまとめる
+            async with self.db.transaction():
+                for line in lines:
+                    match = re.match(r"^(.*?)[:，,、\s]+(.+)$", line)
+                    if not match:
+                        logging.warning(f"Line '{line}' does not match the expected format.")
+                        continue
+                    english_word = match.group(1).strip()
+                    japanese_meaning = match.group(2).strip()
+                    if english_word in pending_index:
+                        new_pairs[pending_index[english_word]] = (english_word, japanese_meaning)
+                        continue
+                    # Check if word exists for this user
+                    existing = await self.db.fetchone(
+                        "SELECT id, meaning FROM words WHERE user_id = ? AND word = ?",
+                        (message.author.id, english_word),
                     )
-                    updated_entries.append((word_id, english_word, old_meaning, japanese_meaning))
-                    recent_items.append((word_id, english_word, japanese_meaning))
-                else:
-                    added_at = datetime.now(self.bot.JST).isoformat()
-                    intervals_remaining = ",".join(map(str, [1, 4, 10, 17, 30]))
-                    await self.db.execute(
-                        """
-                        INSERT INTO words (user_id, word, meaning, added_at, intervals_remaining)
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        (
-                            message.author.id,
-                            english_word,
-                            japanese_meaning,
-                            added_at,
-                            intervals_remaining,
-                        ),
+                    if existing:
+                        word_id, old_meaning = existing
+                        # Update meaning
+                        await self.db.execute(
+                            "UPDATE words SET meaning = ? WHERE id = ?",
+                            (japanese_meaning, word_id),
+                        )
+                        updated_entries.append((word_id, english_word, old_meaning, japanese_meaning))
+                        recent_items.append((word_id, english_word, japanese_meaning))
+                    else:
+                        pending_index[english_word] = len(new_pairs)
+                        new_pairs.append((english_word, japanese_meaning))
+                if new_pairs:
+                    new_ids = await words_util.insert_pairs(
+                        message.author.id, new_pairs, datetime.now(self.bot.JST)
                     )
-                    # Fetch inserted id
-                    row = await self.db.fetchone("SELECT last_insert_rowid()")
-                    inserted_entries.append((row[0], english_word, japanese_meaning))
-                    recent_items.append((row[0], english_word, japanese_meaning))
+                    for word_id, (english_word, japanese_meaning) in zip(new_ids, new_pairs):
+                        inserted_entries.append((word_id, english_word, japanese_meaning))
+                        recent_items.append((word_id, english_word, japanese_meaning))
+            if new_pairs or updated_entries:
+                words_util.invalidate_user(message.author.id)
 
             if inserted_entries or updated_entries:
                 lines = []
@@ -256,6 +249,7 @@ class EditWordModal(discord.ui.Modal, title="単語を編集するよ！"):
                 "UPDATE words SET word = ?, meaning = ? WHERE id = ? AND user_id = ?",
                 (str(self.word.value).strip(), str(self.meaning.value).strip(), self.word_id, self.author_id),
             )
+            words_util.invalidate_user(self.author_id)
             await interaction.response.send_message("更新したよ！", ephemeral=True)
         except Exception:
             await interaction.response.send_message("ごめんね、更新に失敗しちゃった…", ephemeral=True)
@@ -309,12 +303,16 @@ class RegistrationActionsView(discord.ui.View):
         if interaction.user.id != self.author_id:
             await interaction.response.send_message("これは発行者だけが取り消せるよ！", ephemeral=True)
             return
-        # Delete inserted rows
-        for word_id in self.inserted_ids:
-            await self.db.execute("DELETE FROM words WHERE user_id = ? AND id = ?", (self.author_id, word_id))
-        # Revert updated rows
-        for word_id, word, old_meaning, new_meaning in self.updated:
-            await self.db.execute("UPDATE words SET meaning = ? WHERE user_id = ? AND id = ?", (old_meaning, self.author_id, word_id))
+        async with self.db.transaction():
+            # Delete inserted rows
+            for word_id in self.inserted_ids:
+                await self.db.execute("DELETE FROM words WHERE user_id = ? AND id = ?", (self.author_id, word_id))
+            # Revert updated rows
+            for word_id, word, old_meaning, new_meaning in self.updated:
+                await self.db.execute("UPDATE words SET meaning = ? WHERE user_id = ? AND id = ?", (old_meaning, self.author_id, word_id))
+            if self.inserted_ids:
+                await activity.refresh(self.author_id)
+        words_util.invalidate_user(self.author_id)
         # Disable buttons
         for item in self.children:
             if isinstance(item, discord.ui.Button) or isinstance(item, discord.ui.Select):
@@ -1,15 +1,27 @@
 # bot/cogs/reminders.py
-from discord.ext import commands, tasks
+from discord.ext import commands
 from bot.utils.database import Database
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timedelta, time, timezone
 import pytz
 import asyncio
 import logging
 import os
 from discord import app_commands
-import discord
-from bot.utils.review import ReminderView
+from typing import Optional
+from bot.utils.review import ReminderView, SNOOZE_JOB
+from bot.utils import words as words_util
+from bot.utils.fanout import DMJob, FAILED, FORBIDDEN, SENT, get_dm_fanout
+from bot.utils.delayed_jobs import get_delayed_jobs
+from bot.utils.leases import PartitionLeases
+from bot.utils.config import LEASE_TTL_SECONDS, REMINDER_MISFIRE_GRACE_MINUTES, REMINDER_SLOT_CONCURRENCY
+from bot.utils import recurring
+from bot.utils import outbox
+from bot.utils import user_settings
+from bot.utils import activity
+from bot.utils import review_log
 
 # ログファイルのディレクトリを設定
 log_dir = 'logs'
@@ -29,8 +41,9 @@ logging.basicConfig(
     ]
 )
 
-INTERVALS = [1, 4, 10, 17, 30, 60]
 JST = timezone(timedelta(hours=9))  # タイムゾーンを定義
+# 分割ごとの「最後に処理した枠」マーカー名（job_runs）
+SLOT_MARKER = "reminders:slot:{}"
 
 class Reminders(commands.Cog):
     def __init__(self, bot):
@@ -38,106 +51,164 @@ class Reminders(commands.Cog):
         self.db = None
         self.scheduler = None
         self.setup_complete = False
-        # タスクの状態を追跡
-        self.daily_reminder_started = False
-        self.check_reminders_started = False  # コメントアウトを解除
+        # 複数プロセス運用: ユーザーを user_id % REMINDER_PARTITIONS で分割し、リースを持つ分だけ処理する
+        self.leases = PartitionLeases("reminders")
+        # 最後に処理した1分枠（UTC）と実行中の枠タスク
+        self.last_slot = None
+        self.slot_tasks = set()
+        # 同時に走る枠の数を制限（取りこぼしの追いかけで数百枠がまとめて来ても DB の読み取りプールを食い尽くさない）
+        self.slot_limit = asyncio.Semaphore(REMINDER_SLOT_CONCURRENCY)
+        # 分割ごとの実行中の枠と、完了した最新の枠（マーカーは未完了の最古の枠の手前までしか進めない）
+        self.inflight_slots = {}
+        self.done_slots = {}
+        # 一回きりの遅延ジョブ（スヌーズなど）。永続化されていて再起動後に復元される
+        self.jobs = get_delayed_jobs()
+        self.jobs.register(SNOOZE_JOB, self._send_snooze)
         self.startup_time = datetime.now(JST)
         logging.info(f"Bot startup time (JST): {self.startup_time}")
         logging.info("Reminders Cog initialized")
 
     # --- Internal runners for reuse by tasks and test command ---
-    async def _run_daily_reminder_once(self):
-        logging.info(f"daily_reminder manual run at: {datetime.now(JST)}")
-        db = await Database.get_instance()
-        now = datetime.now(self.bot.JST)
-
-        all_users_words = {}
-        rows = await db.fetchall("SELECT user_id, id, word, meaning, added_at, intervals_remaining FROM words")
-        for user_id, word_id, word, meaning, added_at, intervals_remaining in rows:
-            try:
-                added_time = datetime.fromisoformat(added_at).astimezone(self.bot.JST)
-            except Exception:
-                # Fallback if timezone conversion fails
-                added_time = datetime.fromisoformat(added_at)
-            days_passed = (now.date() - added_time.date()).days
-            if intervals_remaining == 'done':
-                continue
-            if days_passed in INTERVALS:
-                all_users_words.setdefault(user_id, []).append((word_id, word, meaning))
+    def _daily_job(self, user_id: int, items) -> DMJob:
+        preview = [f"・{w}" for (_, w, _) in items[:10]]
+        more = "\n…" if len(items) > 10 else ""
+        message = f"<@{user_id}> お兄ちゃん、今日の単語だよ！\n" + "\n".join(preview) + more
+        tzlabel = str(self.bot.JST)
+        return DMJob(
+            user_id,
+            message,
+            view_factory=lambda: ReminderView(user_id, items, tzlabel),
+            meta=items,
+        )
+
+    async def schedule_once(self, kind: str, when, payload: dict) -> int:
+        """任意の一回きりジョブを登録する。handler は self.jobs.register(kind, handler) で登録しておくこと"""
+        return await self.jobs.schedule(kind, when, payload)
 
-        users_sent = 0
+    async def _send_snooze(self, payload: dict):
+        user_id = payload["user_id"]
+        items = await words_util.fetch_words_by_ids(user_id, payload.get("word_ids", []))
+        if not items:
+            logging.info(f"Snoozed words for {user_id} are gone; skipping snooze DM.")
+            return
+        tzlabel = str(self.bot.JST)
+        job = DMJob(
+            user_id,
+            "お兄ちゃん、さっきの続きやろっ！",
+            view_factory=lambda: ReminderView(user_id, items, tzlabel),
+        )
+        outcome = await get_dm_fanout(self.bot).send(job)
+        if outcome == FORBIDDEN:
+            logging.info(f"User {user_id} has DMs disabled; skipping snooze DM.")
+        elif outcome == FAILED:
+            # transient (5xx, network): raise so the delayed job queue retries it
+            raise RuntimeError(f"snooze DM to {user_id} failed")
+        elif outcome != SENT:
+            logging.warning(f"Snooze DM failed for {user_id}: {outcome}")
+
+    async def _run_daily_reminder_once(self, now=None, tz_name=None, remind_minute=None, partitions=None):
+        """今日の単語リマインド。tz_name/remind_minute を渡すとその時刻枠（partitions があればその分割）のユーザーだけが対象"""
+        now = now or datetime.now(self.bot.JST)
+        slot = f" {tz_name} {user_settings.format_minute(remind_minute)}" if tz_name else ""
+        logging.info(f"daily_reminder run{slot} at: {now}")
+        if tz_name:
+            now = now.astimezone(pytz.timezone(tz_name))
+        run_date = now.date()
+        # A rerun (retry or restart) of the same day only sends what is still undelivered.
+        slot_args = (tz_name, remind_minute, self._partition_sql(partitions))
+        settled = await outbox.settled_users(run_date, outbox.DAILY, *slot_args)
         total_words = 0
-        for user_id, items in all_users_words.items():
-            if not items:
-                continue
-            user = self.bot.get_user(user_id)
-            if not user:
-                try:
-                    user = await self.bot.fetch_user(user_id)
-                except Exception as e:
-                    logging.warning(f"User {user_id} not found in cache and fetch failed: {e}")
-                    user = None
-            if not user:
-                continue
-            try:
-                channel = user.dm_channel or await user.create_dm()
-                preview = [f"・{w}" for (_, w, _) in items[:10]]
-                more = "\n…" if len(items) > 10 else ""
-                message = f"{user.mention} お兄ちゃん、今日の単語だよ！\n" + "\n".join(preview) + more
-                view = ReminderView(user_id, items, str(self.bot.JST))
-                await channel.send(message, view=view)
-                logging.info(f"Sent daily reminder to user {user_id}: {[w for (_, w, _) in items]}")
-                users_sent += 1
-                total_words += len(items)
-            except discord.Forbidden:
-                # User has DMs disabled or blocked the bot
-                logging.info(f"User {user_id} has DMs disabled; skipping daily reminder.")
-            except discord.HTTPException as e:
-                logging.warning(f"HTTP error sending daily reminder to {user_id}: {e}")
-            except Exception as e:
-                logging.warning(f"Failed to send daily reminder DM to user {user_id}: {e}")
-        logging.info("Daily reminder run completed")
-        return users_sent, total_words
 
-    async def _run_check_reminders_once(self):
-        db = await Database.get_instance()
-        now = datetime.now(self.bot.JST)
+        async def jobs():
+            # Due words are streamed user by user, so the first DM goes out right away
+            # and memory stays bounded by the fetch chunk size.
+            async for user_id, items in words_util.iter_due_words_by_user(
+                now, tz_name, remind_minute, self._partition_sql(partitions)
+            ):
+                if user_id not in settled:
+                    yield self._daily_job(user_id, items)
+
+        async def on_result(job: DMJob, outcome: str):
+            nonlocal total_words
+            await outbox.record(run_date, outbox.DAILY, job.user_id, outcome)
+            if outcome == SENT:
+                total_words += len(job.meta)
+
+        report = await get_dm_fanout(self.bot).run(jobs(), label=f"daily_reminder{slot}", on_result=on_result)
+        delivery = await outbox.delivery_report(run_date, outbox.DAILY, *slot_args)
+        logging.info(
+            f"Daily reminder run{slot} completed: skipped {len(settled)} settled user(s); "
+            f"outbox {run_date}: {outbox.format_report(delivery)}"
+        )
+        return report.sent, total_words
+
+    async def _run_check_reminders_once(self, now=None, tz_name=None, remind_minute=None, partitions=None):
+        """今日まだ単語を登録していないユーザーへの通知。引数は _run_daily_reminder_once と同じ"""
+        now = now or datetime.now(self.bot.JST)
+        slot = f" {tz_name} {user_settings.format_minute(remind_minute)}" if tz_name else ""
+        tz = pytz.timezone(tz_name) if tz_name else self.bot.JST
+        now = now.astimezone(tz)
         today = now.date()
-        rows = await db.fetchall("SELECT DISTINCT user_id FROM words")
-        all_users = {row[0] for row in rows}
-        today_rows = await db.fetchall(
-            "SELECT DISTINCT user_id FROM words WHERE date(added_at) = date(?)",
-            (today.strftime("%Y-%m-%d"),),
+        # One indexed lookup in user_activity: users with words but nothing registered since local midnight
+        day_start = tz.localize(datetime.combine(today, time.min))
+        candidates = await activity.inactive_users(
+            day_start, tz_name, remind_minute, self._partition_sql(partitions)
+        )
+        slot_args = (tz_name, remind_minute, self._partition_sql(partitions))
+        settled = await outbox.settled_users(today, outbox.INACTIVE, *slot_args)
+        inactive_users = candidates - settled
+        jobs = (
+            DMJob(
+                user_id,
+                f"<@{user_id}> お兄ちゃん、今日はまだ単語の登録してないよ！\n"
+                "新しい単語を覚えて、もっと賢くなろうね！ (｀・ω・´)ゞ",
+            )
+            for user_id in inactive_users
         )
-        active_users = {row[0] for row in today_rows}
-        inactive_users = all_users - active_users
-        users_sent = 0
-        for user_id in inactive_users:
-            user = self.bot.get_user(user_id)
-            if not user:
+
+        async def on_result(job: DMJob, outcome: str):
+            await outbox.record(today, outbox.INACTIVE, job.user_id, outcome)
+
+        report = await get_dm_fanout(self.bot).run(jobs, label=f"check_reminders{slot}", on_result=on_result)
+        delivery = await outbox.delivery_report(today, outbox.INACTIVE, *slot_args)
+        logging.info(
+            f"Inactivity reminder run{slot} completed: skipped {len(settled)} settled user(s); "
+            f"outbox {today}: {outbox.format_report(delivery)}"
+        )
+        return report.sent
+
+    def _partition_sql(self, partitions):
+        return ("", ()) if partitions is None else self.leases.filter("s.user_id", partitions)
+
+    async def _process_slot(self, slot: datetime, partitions=None):
+        """1分枠（UTC）ぶんのリマインダーを処理する。ユーザーのいる (timezone, 時刻) だけを実行
+
+        partitions を省略すると、このプロセスが今リースを持っている分割すべてが対象。
+        枠マーカーは進めない（_spawn_slot が完了順を見て進める）。
+        """
+        partitions = set(self.leases.held) if partitions is None else set(partitions)
+        if not partitions:
+            return
+        for tz_name, remind_minute in sorted(await user_settings.slots()):
+            local = slot.astimezone(pytz.timezone(tz_name))
+            local_minute = local.hour * 60 + local.minute
+            if remind_minute == local_minute:
                 try:
-                    user = await self.bot.fetch_user(user_id)
+                    await self._run_daily_reminder_once(local, tz_name, remind_minute, partitions)
                 except Exception as e:
-                    logging.warning(f"User {user_id} not found in cache and fetch failed: {e}")
-                    user = None
-            if not user:
-                continue
-            try:
-                channel = user.dm_channel or await user.create_dm()
-                await channel.send(
-                    f"{user.mention} お兄ちゃん、今日はまだ単語の登録してないよ！\n"
-                    "新しい単語を覚えて、もっと賢くなろうね！ (｀・ω・´)ゞ"
-                )
-                logging.info(f"Sent reminder to inactive user {user_id}")
-                users_sent += 1
-            except discord.Forbidden:
-                logging.info(f"User {user_id} has DMs disabled; skipping inactivity reminder.")
-            except discord.HTTPException as e:
-                logging.warning(f"HTTP error sending inactivity reminder to {user_id}: {e}")
-            except Exception as e:
-                logging.warning(f"Failed to send inactivity reminder DM to user {user_id}: {e}")
-        logging.info("Inactivity reminder run completed")
-        return users_sent
+                    logging.error(f"Error in daily reminder slot {tz_name} {local:%H:%M}: {e}", exc_info=True)
+                    await asyncio.sleep(300)
+                    try:
+                        await self._run_daily_reminder_once(local, tz_name, remind_minute, partitions)
+                    except Exception as retry_e:
+                        logging.error(f"Retry failed in daily reminder slot: {retry_e}", exc_info=True)
+            if (remind_minute + user_settings.INACTIVE_DELAY_MINUTES) % (24 * 60) == local_minute:
+                # the nudge belongs to the day of the reminder, even when it lands after midnight
+                reminder_time = local - timedelta(minutes=user_settings.INACTIVE_DELAY_MINUTES)
+                try:
+                    await self._run_check_reminders_once(reminder_time, tz_name, remind_minute, partitions)
+                except Exception as e:
+                    logging.error(f"Error in check reminders slot {tz_name} {local:%H:%M}: {e}", exc_info=True)
 
     async def initialize_database(self):
         """データベース接続を初期化する"""
@@ -165,17 +236,45 @@ class Reminders(commands.Cog):
             if self.scheduler is None:
                 logging.info(f"Initializing scheduler with timezone: {self.bot.JST}")
                 self.scheduler = AsyncIOScheduler(timezone=str(self.bot.JST))
+                await self.jobs.start()
+
+                # 定期ジョブはすべてこのスケジューラで動かす（coalesce・misfire 猶予・実行記録つき）
+                await recurring.add_recurring(
+                    self.scheduler,
+                    "reminders:leases",
+                    self._lease_tick,
+                    IntervalTrigger(seconds=LEASE_TTL_SECONDS / 3),
+                    misfire_grace_time=int(LEASE_TTL_SECONDS),
+                    catch_up=False,
+                )
+                # 枠の取りこぼしは分割リース取得時に job_runs のマーカーから追いかける
+                await recurring.add_recurring(
+                    self.scheduler,
+                    "reminders:slots",
+                    self._slot_tick,
+                    CronTrigger(second=0),
+                    misfire_grace_time=30,
+                    catch_up=False,
+                )
+                await recurring.add_recurring(
+                    self.scheduler,
+                    "outbox:prune",
+                    self._prune_outbox,
+                    CronTrigger(hour=4, minute=0, timezone=self.bot.JST),
+                    misfire_grace_time=3600,
+                )
+                # 保持期間を過ぎた復習ログを日別集計とチェックポイントに畳む
+                await recurring.add_recurring(
+                    self.scheduler,
+                    "review_log:prune",
+                    self._prune_review_log,
+                    CronTrigger(hour=4, minute=10, timezone=self.bot.JST),
+                    misfire_grace_time=3600,
+                )
                 self.scheduler.start()
-                
-                # タスクが開始されていない場合のみ開始
-                if not self.daily_reminder_started:
-                    self.daily_reminder.start()
-                    self.daily_reminder_started = True
-                
-                if not self.check_reminders_started:
-                    self.check_reminders.start()
-                    self.check_reminders_started = True
-                
+                # 起動直後にリースを取りにいく（取れた分割の取りこぼし枠もここで処理される）
+                self.scheduler.modify_job("reminders:leases", next_run_time=datetime.now(self.bot.JST))
+
                 logging.info("Scheduler initialized and tasks started")
                 return True
             
@@ -207,51 +306,152 @@ class Reminders(commands.Cog):
             except Exception as e:
                 logging.error(f"Error in on_ready: {e}", exc_info=True)
 
-    @tasks.loop(time=time(hour=21, minute=0, tzinfo=JST))
-    async def daily_reminder(self):
-        """指定の時刻に実行される日次リマインダー"""
+    async def _slot_tick(self):
+        """毎分、その分に当たるリマインダー枠を処理する（イベントループが詰まって飛んだ分も追いかける）"""
         if not self.setup_complete:
             return
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        start = now if self.last_slot is None else self.last_slot + timedelta(minutes=1)
+        start = max(start, now - timedelta(minutes=REMINDER_MISFIRE_GRACE_MINUTES))
+        slot = start
+        while slot <= now:
+            self._spawn_slot(slot)
+            slot += timedelta(minutes=1)
+        self.last_slot = now
+
+    def _spawn_slot(self, slot: datetime, partitions=None):
+        # every slot runs on its own task, so a slow slot never delays the next one beyond
+        # REMINDER_SLOT_CONCURRENCY; waiting slots start in order as running ones finish
+        partitions = set(self.leases.held) if partitions is None else set(partitions)
+        if not partitions:
+            return
+        for partition in partitions:
+            self.inflight_slots.setdefault(partition, set()).add(slot)
+        task = asyncio.create_task(self._run_slot(slot, partitions))
+        self.slot_tasks.add(task)
+        task.add_done_callback(self.slot_tasks.discard)
+
+    async def _run_slot(self, slot: datetime, partitions):
+        # A cancelled or failed slot stays in inflight_slots, so the marker never passes it in this
+        # process and the next owner replays it from the marker.
         try:
-            await self._run_daily_reminder_once()
+            async with self.slot_limit:
+                await self._process_slot(slot, partitions)
         except Exception as e:
-            logging.error(f"Error in daily_reminder: {e}", exc_info=True)
-            await asyncio.sleep(300)
-            try:
-                await self._run_daily_reminder_once()
-            except Exception as retry_e:
-                logging.error(f"Retry failed in daily_reminder: {retry_e}", exc_info=True)
-
-    @daily_reminder.before_loop
-    async def before_daily_reminder(self):
-        """デイリーリマインダーの開始前処理"""
-        await self.bot.wait_until_ready()
-        logging.info("Daily reminder is about to start.")
-
-    @tasks.loop(time=time(hour=22, minute=0, tzinfo=JST))
-    async def check_reminders(self):
-        """22:00に実行されるリマインダーチェック - その日に単語登録がないユーザーにメッセージを送信"""
-        if not self.setup_complete:
+            logging.error(f"Reminder slot {slot:%Y-%m-%d %H:%M} failed: {e}", exc_info=True)
             return
+        for partition in partitions:
+            inflight = self.inflight_slots[partition]
+            inflight.discard(slot)
+            done = max(slot, self.done_slots.get(partition, slot))
+            self.done_slots[partition] = done
+            # Later slots can finish first; the marker only covers slots with nothing older still running,
+            # so a restart replays an unfinished slot instead of skipping it.
+            mark = min(done, min(inflight) - timedelta(minutes=1)) if inflight else done
+            await recurring.mark_run(SLOT_MARKER.format(partition), mark.timestamp())
+
+    async def _lease_tick(self):
+        """分割リースの更新・取得・返却。新しく取った分割は最後に処理された枠から追いかける"""
         try:
-            await self._run_check_reminders_once()
+            gained, lost = await self.leases.rebalance()
         except Exception as e:
-            logging.error(f"Error in check_reminders: {e}", exc_info=True)
+            logging.error(f"Failed to renew reminder leases: {e}", exc_info=True)
+            return
+        if lost:
+            logging.info(f"Reminder partitions released or lost by {self.leases.owner}: {sorted(lost)}")
+        if gained:
+            logging.info(f"Reminder partitions claimed by {self.leases.owner}: {sorted(gained)}")
+            await self._catch_up(gained)
+
+    async def _catch_up(self, partitions):
+        """マーカー以降に取りこぼした枠を一度だけ処理する（猶予 REMINDER_MISFIRE_GRACE_MINUTES 以内のみ）
+
+        Each (timezone, minute) slot occurs once a day, so replaying at most the last
+        24 hours coalesces any number of missed days into a single run per slot. The
+        outbox skips users a previous owner already reached.
+        """
+        end = self.last_slot or datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        earliest = end - timedelta(minutes=REMINDER_MISFIRE_GRACE_MINUTES)
+        starts = {}
+        for partition in partitions:
+            marker = await recurring.last_run(SLOT_MARKER.format(partition))
+            if marker is None:
+                # first run for this partition: nothing was scheduled before
+                await recurring.mark_run(SLOT_MARKER.format(partition), end.timestamp())
+                continue
+            starts[partition] = max(earliest, datetime.fromtimestamp(marker, timezone.utc) + timedelta(minutes=1))
+        if not starts:
+            return
+        slot = min(starts.values())
+        missed = 0
+        while slot <= end:
+            due = {p for p, start in starts.items() if start <= slot}
+            self._spawn_slot(slot, due)
+            missed += 1
+            slot += timedelta(minutes=1)
+        logging.info(f"Catching up {missed} reminder slot(s) for partitions {sorted(starts)}")
 
-    @check_reminders.before_loop
-    async def before_check_reminders(self):
-        """チェックリマインダーの開始前処理"""
-        await self.bot.wait_until_ready()
-        logging.info("Check reminders is about to start.")
+    async def _prune_outbox(self):
+        await outbox.prune(datetime.now(self.bot.JST).date())
+
+    async def _prune_review_log(self):
+        pruned = await review_log.prune()
+        if pruned:
+            logging.info(f"Folded {pruned} review log row(s) into daily totals")
 
     def cog_unload(self):
         """Cogがアンロードされる時の処理"""
-        if self.daily_reminder_started:
-            self.daily_reminder.cancel()
-        if self.check_reminders_started:
-            self.check_reminders.cancel()
+        for task in list(self.slot_tasks):
+            task.cancel()
+        self.jobs.stop()
         if self.scheduler:
             self.scheduler.shutdown()
+            # hand partitions over right away instead of waiting for the leases to expire
+            asyncio.create_task(self.leases.release_all())
+
+    # --- Per-user reminder settings ---
+    @app_commands.command(name="reminder_time", description="リマインドの時刻とタイムゾーンを設定するよ！（何も指定しないと今の設定を表示）")
+    @app_commands.describe(time="通知する時刻（例: 21:00）", timezone="タイムゾーン（例: Asia/Tokyo, America/New_York）")
+    async def reminder_time(self, interaction, time: Optional[str] = None, timezone: Optional[str] = None):
+        minute = None
+        if time is not None:
+            minute = user_settings.parse_time(time)
+            if minute is None:
+                await interaction.response.send_message("時刻は「21:00」みたいに HH:MM で教えてね！", ephemeral=True)
+                return
+        tz_name = None
+        if timezone is not None:
+            tz_name = user_settings.resolve_timezone(timezone)
+            if tz_name is None:
+                await interaction.response.send_message(
+                    f"「{timezone}」っていうタイムゾーンは知らないなぁ… Asia/Tokyo みたいな形で指定してね！",
+                    ephemeral=True,
+                )
+                return
+        try:
+            if minute is None and tz_name is None:
+                tz_name, minute = await user_settings.get(interaction.user.id)
+                head = "今の設定だよ！"
+            else:
+                tz_name, minute = await user_settings.update(interaction.user.id, tz_name, minute)
+                head = "設定したよ！"
+            check = (minute + user_settings.INACTIVE_DELAY_MINUTES) % (24 * 60)
+            await interaction.response.send_message(
+                f"{head}\n"
+                f"・タイムゾーン: {tz_name}\n"
+                f"・今日の単語リマインド: {user_settings.format_minute(minute)}\n"
+                f"・未登録のお知らせ: {user_settings.format_minute(check)}",
+                ephemeral=True,
+            )
+        except Exception as e:
+            logging.error(f"Failed to update reminder settings for {interaction.user.id}: {e}", exc_info=True)
+            await interaction.response.send_message("ごめんね、設定の保存に失敗しちゃった…(>_<)", ephemeral=True)
+
+    @reminder_time.autocomplete("timezone")
+    async def reminder_time_timezone_autocomplete(self, interaction, current: str):
+        current = current.lower()
+        matches = [tz for tz in pytz.common_timezones if current in tz.lower()]
+        return [app_commands.Choice(name=tz, value=tz) for tz in matches[:25]]
 
     # --- Admin/Test slash command ---
     @app_commands.command(name="test_reminders", description="(Admin) リマインダーを今すぐテスト実行するよ！")
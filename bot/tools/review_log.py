@@ -0,0 +1,64 @@
+# bot/tools/review_log.py
+"""Maintain the review log: show its size, prune old days, or replay it into word_stats.
+
+``replay`` recomputes word_stats (and, unless --no-reschedule, each studied word's
+next review day) from review_checkpoint plus the remaining log with the current
+scheduler in bot/utils/srs.py — run it after changing the scheduler. Stop the bot
+first, or it may write answers between the read and the rewrite.
+
+    python -m bot.tools.review_log info
+    python -m bot.tools.review_log prune --days 90
+    python -m bot.tools.review_log replay [--user 1234]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+
+async def run(args) -> None:
+    import bot.utils.database as database
+
+    database.DATABASE = args.db
+    from bot.utils import review_log
+
+    db = await database.Database.get_instance()
+    try:
+        if args.command == "info":
+            rows, first, last = await db.fetchone("SELECT COUNT(*), MIN(ts), MAX(ts) FROM review_log")
+            daily = (await db.fetchone("SELECT COUNT(*) FROM review_daily"))[0]
+            checkpoints = (await db.fetchone("SELECT COUNT(*) FROM review_checkpoint"))[0]
+            span = f"{time.strftime('%Y-%m-%d', time.gmtime(first))} .. {time.strftime('%Y-%m-%d', time.gmtime(last))}" if rows else "-"
+            print(f"review_log: {rows} rows ({span}); review_daily: {daily} rows; review_checkpoint: {checkpoints} words")
+        elif args.command == "prune":
+            started = time.perf_counter()
+            pruned = await review_log.prune(retention_days=args.days)
+            print(f"pruned {pruned} rows older than {args.days} days in {time.perf_counter() - started:.2f}s")
+        elif args.command == "replay":
+            started = time.perf_counter()
+            words = await review_log.replay(args.user, reschedule=not args.no_reschedule)
+            print(f"rebuilt word_stats for {words} words in {time.perf_counter() - started:.2f}s")
+    finally:
+        await db.close()
+
+
+def main() -> None:
+    from bot.utils.config import REVIEW_LOG_RETENTION_DAYS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="words.db")
+    parser.add_argument("--verbose", action="store_true")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("info", help="row counts and time span")
+    prune = sub.add_parser("prune", help="fold days older than --days into daily totals and checkpoints")
+    prune.add_argument("--days", type=int, default=REVIEW_LOG_RETENTION_DAYS)
+    replay = sub.add_parser("replay", help="recompute word_stats from the log")
+    replay.add_argument("--user", type=int, default=None, help="only this user's words")
+    replay.add_argument("--no-reschedule", action="store_true", help="leave next_due_day as it is")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
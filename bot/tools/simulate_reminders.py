@@ -0,0 +1,252 @@
+# bot/tools/simulate_reminders.py
+"""Measure reminder throughput against a synthetic database and a fake Discord.
+
+Seeds a throwaway SQLite file with N users on the default 21:00 Asia/Tokyo slot,
+then runs the production per-minute path, ``Reminders._process_slot``, for the
+21:00 slot (daily reminder) and the 22:00 slot (inactivity reminder) against a
+stand-in client whose ``fetch_user``/``create_dm``/``send`` sleep for a
+configurable latency and answer with 429s at a configurable rate. Nobody is messaged.
+
+    python -m bot.tools.simulate_reminders --users 10000 --words 20 --latency-ms 40 --rate-429 0.01
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import resource
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import discord
+import pytz
+
+JST = pytz.timezone("Asia/Tokyo")
+
+
+class FakeResponse:
+    """Just enough of an aiohttp response for discord.HTTPException."""
+
+    def __init__(self, status: int, retry_after: float = 0.0):
+        self.status = status
+        self.reason = "Too Many Requests" if status == 429 else "OK"
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class FakeDiscord:
+    """Stand-in for the bot's REST surface used by the DM fan-out."""
+
+    def __init__(self, latency: float, jitter: float, rate_429: float, retry_after: float, seed: int):
+        self.JST = JST
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.calls = {"fetch_user": 0, "create_dm": 0, "send": 0, "429": 0, "delivered": 0}
+
+    async def request(self, route: str) -> None:
+        self.calls[route] += 1
+        await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+        if self.rate_429 and self.random.random() < self.rate_429:
+            self.calls["429"] += 1
+            raise discord.HTTPException(FakeResponse(429, self.retry_after), "You are being rate limited.")
+
+    # --- discord.Client surface ---
+    def get_user(self, user_id: int):
+        return None  # empty cache, like a bot without the members intent warmed up
+
+    async def fetch_user(self, user_id: int) -> "FakeUser":
+        await self.request("fetch_user")
+        return FakeUser(self, user_id)
+
+    def get_partial_messageable(self, channel_id: int, type=None) -> "FakeChannel":
+        return FakeChannel(self, channel_id)
+
+
+class FakeUser:
+    def __init__(self, client: FakeDiscord, user_id: int):
+        self.client = client
+        self.id = user_id
+        self.dm_channel = None
+
+    async def create_dm(self) -> "FakeChannel":
+        await self.client.request("create_dm")
+        self.dm_channel = FakeChannel(self.client, self.id + 1)
+        return self.dm_channel
+
+
+class FakeChannel:
+    def __init__(self, client: FakeDiscord, channel_id: int):
+        self.client = client
+        self.id = channel_id
+
+    async def send(self, content: str, view=None):
+        await self.client.request("send")
+        self.client.calls["delivered"] += 1
+
+
+class DBTimer:
+    """Accumulates wall time spent awaiting the Database singleton's methods."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+
+    def wrap(self, db) -> None:
+        for name in ("execute", "executemany", "fetchone", "fetchall"):
+            setattr(db, name, self._timed(getattr(db, name)))
+        db.iter_chunks = self._timed_iter(db.iter_chunks)
+
+    def _timed(self, fn):
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - started
+                self.calls += 1
+
+        return wrapper
+
+    def _timed_iter(self, fn):
+        timer = self
+
+        async def wrapper(*args, **kwargs):
+            gen = fn(*args, **kwargs)
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        rows = await gen.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        timer.seconds += time.perf_counter() - started
+                        timer.calls += 1
+                    yield rows
+            finally:
+                await gen.aclose()
+
+        return wrapper
+
+
+async def seed(db, users: int, words: int, due_fraction: float, active_fraction: float, rng: random.Random) -> None:
+    """Fill words/user_settings/user_activity with synthetic users."""
+    from bot.utils import srs
+    from bot.utils.schedule import day_number
+
+    now = datetime.now(JST)
+    today = day_number(now)
+    base_user = 10**17  # snowflake-sized ids
+    async with db.transaction():
+        for start in range(0, users, 1000):
+            rows = []
+            for user_id in range(base_user + start, base_user + min(users, start + 1000)):
+                active = rng.random() < active_fraction
+                for n in range(words):
+                    added = now if active and n == 0 else now - timedelta(days=rng.randint(1, 60))
+                    due = today if rng.random() < due_fraction else today + rng.randint(1, 30)
+                    rows.append((user_id, f"word{n}", f"意味{n}", added.isoformat(), srs.ACTIVE, due))
+            await db.db.executemany(
+                "INSERT INTO words (user_id, word, meaning, added_at, intervals_remaining, next_due_day) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        await db.db.execute("INSERT OR IGNORE INTO user_settings (user_id) SELECT DISTINCT user_id FROM words")
+        await db.db.execute(
+            """
+            INSERT OR REPLACE INTO user_activity (user_id, word_count, last_added_at, updated_at)
+            SELECT user_id, COUNT(*), MAX(CAST(strftime('%s', added_at) AS INTEGER)), CAST(strftime('%s', 'now') AS INTEGER) FROM words GROUP BY user_id
+            """
+        )
+
+
+async def measure(label: str, coro_fn, client: FakeDiscord, timer: DBTimer) -> None:
+    calls_before = dict(client.calls)
+    db_before, db_calls_before = timer.seconds, timer.calls
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    result = await coro_fn()
+    result = f"result={result} " if result is not None else ""
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    rest = {k: client.calls[k] - calls_before[k] for k in client.calls}
+    sent = rest.pop("delivered")
+    print(
+        f"{label}: {result}wall={wall:.2f}s msgs/s={sent / wall if wall else 0:.1f} "
+        # awaited time, so concurrent senders waiting on the same writer all count
+        f"db={timer.seconds - db_before:.2f}s/{timer.calls - db_calls_before} calls "
+        f"peak_py_mem={peak / 1024 / 1024:.1f}MiB rest={rest}"
+    )
+
+
+async def run(args) -> None:
+    import bot.utils.database as database
+
+    database.DATABASE = args.db
+    if not args.reuse:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    from bot.cogs.reminders import Reminders
+    from bot.utils.fanout import DMFanout
+
+    rng = random.Random(args.seed)
+    db = await database.Database.get_instance()
+    if not args.reuse:
+        started = time.perf_counter()
+        await seed(db, args.users, args.words, args.due_fraction, args.active_fraction, rng)
+        print(f"seeded {args.users} users x {args.words} words in {time.perf_counter() - started:.1f}s -> {args.db}")
+
+    client = FakeDiscord(args.latency_ms / 1000, args.jitter_ms / 1000, args.rate_429, args.retry_after, args.seed)
+    kwargs = {k: v for k, v in (("concurrency", args.concurrency), ("rate", args.rate)) if v}
+    DMFanout._instance = DMFanout(client, **kwargs)
+    timer = DBTimer()
+    timer.wrap(db)
+    cog = Reminders(client)
+    # The slot scheduler's code path: slot query (user_settings JOIN words) with the
+    # partition filter of a process holding every partition.
+    from bot.utils import user_settings
+
+    partitions = set(range(cog.leases.partitions))
+    remind_at = JST.localize(datetime.combine(datetime.now(JST).date(), datetime.min.time())) + timedelta(
+        minutes=user_settings.DEFAULT_REMIND_MINUTE
+    )
+    inactive_at = remind_at + timedelta(minutes=user_settings.INACTIVE_DELAY_MINUTES)
+
+    tracemalloc.start()
+    try:
+        await measure("daily_reminder", lambda: cog._process_slot(remind_at, partitions), client, timer)
+        await measure("check_reminders", lambda: cog._process_slot(inactive_at, partitions), client, timer)
+    finally:
+        tracemalloc.stop()
+        await db.close()
+    print(f"max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="sim_words.db", help="synthetic database file (recreated unless --reuse)")
+    parser.add_argument("--reuse", action="store_true", help="keep an existing --db instead of seeding")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=20, help="words per user")
+    parser.add_argument("--due-fraction", type=float, default=0.2, help="share of words due today")
+    parser.add_argument("--active-fraction", type=float, default=0.3, help="share of users who registered today")
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="fake REST latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability that a call answers 429")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After of fake 429s (s)")
+    parser.add_argument("--concurrency", type=int, default=0, help="override DM_FANOUT_CONCURRENCY")
+    parser.add_argument("--rate", type=float, default=0.0, help="override DM_RATE_PER_SECOND")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from typing import Optional, Set, Tuple
+
+from .database import Database
+
+# One row per user, kept current by every path that adds or removes words, so the
+# inactivity reminder never has to scan ``words``. Reminder settings live in
+# ``user_settings`` under the same user_id.
+
+
+async def record_added(user_id: int, count: int, when: datetime) -> None:
+    """Count ``count`` new words registered at ``when``."""
+    if count <= 0:
+        return
+    db = await Database.get_instance()
+    await db.execute(
+        """
+        INSERT INTO user_activity (user_id, word_count, last_added_at, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            word_count = user_activity.word_count + excluded.word_count,
+            last_added_at = MAX(COALESCE(user_activity.last_added_at, 0), excluded.last_added_at),
+            updated_at = excluded.updated_at
+        """,
+        (user_id, count, when.timestamp(), time.time()),
+    )
+
+
+async def record_removed(user_id: int, count: int) -> None:
+    if count <= 0:
+        return
+    db = await Database.get_instance()
+    await db.execute(
+        "UPDATE user_activity SET word_count = MAX(0, word_count - ?), updated_at = ? WHERE user_id = ?",
+        (count, time.time(), user_id),
+    )
+
+
+async def refresh(user_id: int) -> None:
+    """Recompute a user's row from ``words`` (after an undo, where the last registration may be gone)."""
+    db = await Database.get_instance()
+    await db.execute(
+        """
+        INSERT INTO user_activity (user_id, word_count, last_added_at, updated_at)
+        SELECT ?, COUNT(*), MAX(CAST(strftime('%s', added_at) AS INTEGER)), ? FROM words WHERE user_id = ?
+        ON CONFLICT(user_id) DO UPDATE SET
+            word_count = excluded.word_count,
+            last_added_at = excluded.last_added_at,
+            updated_at = excluded.updated_at
+        """,
+        (user_id, time.time(), user_id),
+    )
+
+
+async def inactive_users(
+    since: datetime,
+    timezone: Optional[str] = None,
+    remind_minute: Optional[int] = None,
+    partition_sql: Tuple[str, tuple] = ("", ()),
+) -> Set[int]:
+    """Users with words but no registration at or after ``since``.
+
+    With ``timezone``/``remind_minute`` only that reminder slot is considered,
+    optionally narrowed by ``partition_sql`` (a filter on ``s.user_id``).
+    """
+    db = await Database.get_instance()
+    if timezone is None:
+        rows = await db.fetchall(
+            "SELECT user_id FROM user_activity WHERE last_added_at < ? AND word_count > 0",
+            (since.timestamp(),),
+        )
+    else:
+        partition_clause, partition_params = partition_sql
+        rows = await db.fetchall(
+            f"""
+            SELECT s.user_id FROM user_settings s JOIN user_activity a ON a.user_id = s.user_id
+            WHERE s.timezone = ? AND s.remind_minute = ? AND a.last_added_at < ? AND a.word_count > 0{partition_clause}
+            """,
+            (timezone, remind_minute, since.timestamp(), *partition_params),
+        )
+    return {row[0] for row in rows}
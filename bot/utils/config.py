@@ -1,5 +1,6 @@
 import logging
 import os
+import socket
 from typing import Optional
 
 from dotenv import load_dotenv
@@ -8,13 +9,97 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        logging.warning(f"{name} is not an integer; using default {default}.")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        logging.warning(f"{name} is not a number; using default {default}.")
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
 # Public settings
 DISCORD_BOT_TOKEN: Optional[str] = os.getenv("DISCORD_BOT_TOKEN")
 GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL_NAME: str = os.getenv("GEMINI_MODEL", "gemini-1.5-flash").strip()
 PROMPT_TONE: str = os.getenv("PROMPT_TONE", "playful").strip().lower()
 
+# LLM execution layer (see bot/utils/llm.py)
+LLM_MAX_WORKERS: int = max(1, _env_int("LLM_MAX_WORKERS", 4))
+LLM_MAX_CONCURRENCY: int = max(1, _env_int("LLM_MAX_CONCURRENCY", 8))
+LLM_TIMEOUT_SECONDS: float = max(1.0, _env_float("LLM_TIMEOUT_SECONDS", 60.0))
+# Streaming /kaisetu and /bunshou: edit the deferred reply every interval or every N new chars
+LLM_STREAMING: bool = _env_bool("LLM_STREAMING", True)
+STREAM_EDIT_INTERVAL_MS: int = max(250, _env_int("STREAM_EDIT_INTERVAL_MS", 750))
+STREAM_EDIT_EVERY_CHARS: int = max(1, _env_int("STREAM_EDIT_EVERY_CHARS", 300))
+
+# SQLite (see bot/utils/database.py)
+DB_READ_POOL_SIZE: int = max(1, _env_int("DB_READ_POOL_SIZE", 4))
+DB_BUSY_TIMEOUT_MS: int = max(0, _env_int("DB_BUSY_TIMEOUT_MS", 5000))
+# Opt-in group commit: writes arriving within this window share one commit (0 = commit each)
+DB_GROUP_COMMIT_MS: float = max(0.0, _env_float("DB_GROUP_COMMIT_MS", 0.0))
+# Rows fetched per round trip by Database.iter_chunks
+DB_ITER_CHUNK_SIZE: int = max(1, _env_int("DB_ITER_CHUNK_SIZE", 500))
+
+# Reminder DM fan-out (see bot/utils/fanout.py). Discord's global limit is 50 requests/s
+# per bot; every DM costs up to three requests (fetch_user, create_dm, send).
+DM_FANOUT_CONCURRENCY: int = max(1, _env_int("DM_FANOUT_CONCURRENCY", 8))
+DM_RATE_PER_SECOND: float = max(0.1, _env_float("DM_RATE_PER_SECOND", 40.0))
+DM_RATE_BURST: int = max(1, _env_int("DM_RATE_BURST", 10))
+DM_MAX_RETRIES: int = max(0, _env_int("DM_MAX_RETRIES", 3))
+
+# user -> DM channel id cache (see bot/utils/dm_channels.py); the SQLite copy never expires
+DM_CHANNEL_CACHE_SIZE: int = max(1, _env_int("DM_CHANNEL_CACHE_SIZE", 10000))
+DM_CHANNEL_CACHE_TTL_SECONDS: float = max(0.0, _env_float("DM_CHANNEL_CACHE_TTL_SECONDS", 6 * 3600.0))
+
+# Multi-process reminder workers (see bot/utils/leases.py). Users are split into
+# REMINDER_PARTITIONS partitions; each is processed by the worker holding its lease.
+WORKER_ID: str = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+REMINDER_PARTITIONS: int = max(1, _env_int("REMINDER_PARTITIONS", 1))
+LEASE_TTL_SECONDS: float = max(5.0, _env_float("LEASE_TTL_SECONDS", 60.0))
+# Reminder slots missed while the bot was down are replayed once if at most this old
+REMINDER_MISFIRE_GRACE_MINUTES: int = min(24 * 60 - 1, max(0, _env_int("REMINDER_MISFIRE_GRACE_MINUTES", 360)))
+# Reminder slots processed at once (a catch-up can queue hundreds); below the read pool
+# size so the rest of the bot keeps a reader while slots fan out
+REMINDER_SLOT_CONCURRENCY: int = max(1, _env_int("REMINDER_SLOT_CONCURRENCY", max(1, DB_READ_POOL_SIZE - 1)))
+
+# Reminder outbox (see bot/utils/outbox.py)
+OUTBOX_MAX_ATTEMPTS: int = max(1, _env_int("OUTBOX_MAX_ATTEMPTS", 3))
+OUTBOX_RETENTION_DAYS: int = max(1, _env_int("OUTBOX_RETENTION_DAYS", 14))
+
+# Per-user word lists kept in memory (see bot/utils/words.py). The TTL bounds how
+# long another bot process's edits can go unseen.
+WORD_CACHE_SIZE: int = max(1, _env_int("WORD_CACHE_SIZE", 256))
+WORD_CACHE_TTL_SECONDS: float = max(0.0, _env_float("WORD_CACHE_TTL_SECONDS", 600.0))
+WORD_CACHE_MAX_USER_WORDS: int = max(0, _env_int("WORD_CACHE_MAX_USER_WORDS", 5000))
 
-def get_gemini_model(model_name: str = "gemini-1.5-flash"):
+# Review answers are buffered and written in batches (see bot/utils/stats.py)
+STATS_FLUSH_SECONDS: float = max(0.0, _env_float("STATS_FLUSH_SECONDS", 5.0))
+STATS_FLUSH_BATCH: int = max(1, _env_int("STATS_FLUSH_BATCH", 200))
+# Days of raw review_log kept before folding into daily totals (see bot/utils/review_log.py)
+REVIEW_LOG_RETENTION_DAYS: int = max(1, _env_int("REVIEW_LOG_RETENTION_DAYS", 90))
+
+# /kaisetu explanation cache (see bot/utils/explain_cache.py)
+KAISETU_CACHE_TTL_DAYS: float = max(0.0, _env_float("KAISETU_CACHE_TTL_DAYS", 30.0))
+KAISETU_CACHE_MAX_ROWS: int = max(1, _env_int("KAISETU_CACHE_MAX_ROWS", 5000))
+KAISETU_CACHE_MEMORY_SIZE: int = max(1, _env_int("KAISETU_CACHE_MEMORY_SIZE", 256))
+
+
+def get_gemini_model(model_name: str = GEMINI_MODEL_NAME):
     """
     Returns a configured Gemini model if google-generativeai is available and
     GEMINI_API_KEY is set. Otherwise returns None and logs the reason.
@@ -27,11 +112,6 @@ def get_gemini_model(model_name: str = "gemini-1.5-flash"):
         )
         return None
 
-
-def get_prompt_tone() -> str:
-    """Return prompt tone variant: 'concise' or 'playful' (default playful)."""
-    return PROMPT_TONE if PROMPT_TONE in {"concise", "playful"} else "playful"
-
     if not GEMINI_API_KEY:
         logging.warning("GEMINI_API_KEY not set; disabling Gemini-powered features.")
         return None
@@ -42,3 +122,8 @@ def get_prompt_tone() -> str:
     except Exception as e:
         logging.error(f"Failed to configure Gemini: {e}")
         return None
+
+
+def get_prompt_tone() -> str:
+    """Return prompt tone variant: 'concise' or 'playful' (default playful)."""
+    return PROMPT_TONE if PROMPT_TONE in {"concise", "playful"} else "playful"
@@ -1,12 +1,68 @@
 # bot/utils/database.py
+import asyncio
 import aiosqlite
 import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import sqlite3
+from typing import Any, AsyncIterator, Iterable, List, NamedTuple, Optional, Sequence
+
+from .config import DB_BUSY_TIMEOUT_MS, DB_GROUP_COMMIT_MS, DB_ITER_CHUNK_SIZE, DB_READ_POOL_SIZE
+from .migrations import run_migrations
 
 DATABASE = "words.db"
 
+# Applied to every connection. WAL lets readers run alongside the writer;
+# synchronous=NORMAL is durable across application crashes in WAL mode.
+CONNECTION_PRAGMAS = [
+    f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+]
+WRITER_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+]
+READER_PRAGMAS = [
+    "PRAGMA query_only = ON",
+]
+
+# Oldest SQLite library the bot runs on: RETURNING (insert_many, stats) needs 3.35.
+# Queries stick to features of this version (e.g. strftime('%s') rather than unixepoch()).
+SQLITE_MIN_VERSION = (3, 35, 0)
+# Host parameters allowed per statement (SQLITE_MAX_VARIABLE_NUMBER default since 3.32).
+SQLITE_MAX_VARIABLES = 32766
+
+# Set while the current task holds the writer inside ``Database.transaction()``.
+_in_transaction: ContextVar[bool] = ContextVar("_in_transaction", default=False)
+
+
+class _WriteJob(NamedTuple):
+    query: str
+    params: Any
+    future: asyncio.Future
+
+
+class _TransactionJob(NamedTuple):
+    granted: asyncio.Future
+    released: asyncio.Future
+
 
 class Database:
+    """Process-wide SQLite access.
+
+    ``db`` is the single writer connection; all writes are funnelled through a
+    queue into one writer task, so they are applied one at a time in arrival order.
+    Reads (``fetchall``/``fetchone``) are served by a pool of read-only
+    connections and never wait behind writes or behind each other.
+
+    ``async with db.transaction():`` takes the writer for a block of statements
+    committed once at the end. With ``group_commit_ms`` > 0, standalone writes that
+    arrive within that window are applied together and share a single commit.
+    """
+
     _instance = None
+    _lock: Optional[asyncio.Lock] = None
 
     def __init__(self):
         if Database._instance is not None:
@@ -14,62 +70,279 @@ class Database:
         else:
             Database._instance = self
             self.db = None
+            self._readers: Optional[asyncio.Queue] = None
+            self._reader_conns: List[aiosqlite.Connection] = []
+            self._write_queue: Optional[asyncio.Queue] = None
+            self._writer_task: Optional[asyncio.Task] = None
+            self.group_commit_ms = DB_GROUP_COMMIT_MS
             logging.info("Database instance created")
 
     @staticmethod
     async def get_instance():
-        if Database._instance is None:
-            Database()
-            Database._instance.db = await aiosqlite.connect(DATABASE)
-            await Database._instance.setup()
-            logging.info("Database connection established")
+        if Database._instance is not None and Database._instance._writer_task is not None:
+            return Database._instance
+        if Database._lock is None:
+            Database._lock = asyncio.Lock()
+        async with Database._lock:
+            if Database._instance is None:
+                instance = Database()
+                try:
+                    await instance._open()
+                except Exception:
+                    Database._instance = None
+                    raise
+                logging.info("Database connection established")
         return Database._instance
 
+    async def _open(self):
+        if sqlite3.sqlite_version_info < SQLITE_MIN_VERSION:
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} is too old; "
+                f"{'.'.join(map(str, SQLITE_MIN_VERSION))} or newer is required"
+            )
+        db = await aiosqlite.connect(DATABASE)
+        for pragma in WRITER_PRAGMAS + CONNECTION_PRAGMAS:
+            await db.execute(pragma)
+        self.db = db
+        await self.setup()
+        self._readers = asyncio.Queue()
+        for _ in range(DB_READ_POOL_SIZE):
+            reader = await aiosqlite.connect(f"file:{DATABASE}?mode=ro", uri=True)
+            for pragma in READER_PRAGMAS + CONNECTION_PRAGMAS:
+                await reader.execute(pragma)
+            self._reader_conns.append(reader)
+            self._readers.put_nowait(reader)
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop(), name="db-writer")
+        logging.info(f"Database opened in WAL mode with {DB_READ_POOL_SIZE} read connection(s)")
+
     async def setup(self):
         try:
-            await self.db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS words (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    word TEXT,
-                    meaning TEXT,
-                    added_at TEXT,
-                    intervals_remaining TEXT
-                )
-                """
-            )
-            await self.db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS word_stats (
-                    word_id INTEGER PRIMARY KEY,
-                    attempts INTEGER DEFAULT 0,
-                    correct INTEGER DEFAULT 0,
-                    last_seen TEXT,
-                    ease REAL DEFAULT 2.5
-                )
-                """
-            )
-            await self.db.commit()
+            await run_migrations(self.db)
             logging.info("Database tables setup completed")
         except Exception as e:
             logging.error(f"Error setting up database: {e}")
             raise
 
-    async def execute(self, query, params=()):
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        carry = None
+        while True:
+            job = carry or await self._write_queue.get()
+            carry = None
+            if job is None:
+                break
+            if isinstance(job, _TransactionJob):
+                # Hand the connection to the transaction owner until it is done.
+                if not job.granted.done():
+                    job.granted.set_result(None)
+                await job.released
+                continue
+            batch = [job]
+            if self.group_commit_ms > 0:
+                deadline = loop.time() + self.group_commit_ms / 1000
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        nxt = await asyncio.wait_for(self._write_queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if not isinstance(nxt, _WriteJob):
+                        carry = nxt
+                        break
+                    batch.append(nxt)
+            if len(batch) == 1:
+                await self._apply_one(batch[0])
+            else:
+                await self._apply_group(batch)
+
+    async def _apply_one(self, job: _WriteJob):
+        if job.future.cancelled():
+            return
         try:
-            async with self.db.execute(query, params) as cursor:
+            async with self.db.execute(job.query, job.params) as cursor:
                 await self.db.commit()
-                logging.debug(f"Executed query: {query} with params: {params}")
-                return cursor
+                logging.debug(f"Executed query: {job.query} with params: {job.params}")
+            job.future.set_result(cursor)
+        except Exception as e:
+            try:
+                await self.db.rollback()
+            except Exception:
+                pass
+            if not job.future.cancelled():
+                job.future.set_exception(e)
+
+    async def _apply_group(self, batch: List[_WriteJob]):
+        """Apply several queued writes under one commit.
+
+        Each statement runs in its own savepoint so a failing statement only fails
+        its own caller. Results are handed out after the commit succeeds.
+        """
+        results = []
+        try:
+            await self.db.execute("BEGIN")
+            for job in batch:
+                if job.future.cancelled():
+                    results.append(None)
+                    continue
+                await self.db.execute("SAVEPOINT group_write")
+                try:
+                    async with self.db.execute(job.query, job.params) as cursor:
+                        pass
+                    await self.db.execute("RELEASE group_write")
+                    results.append(cursor)
+                except Exception as e:
+                    await self.db.execute("ROLLBACK TO group_write")
+                    await self.db.execute("RELEASE group_write")
+                    results.append(e)
+            await self.db.commit()
+            logging.debug(f"Group-committed {len(batch)} writes")
+        except Exception as e:
+            try:
+                await self.db.rollback()
+            except Exception:
+                pass
+            results = [e] * len(batch)
+        for job, result in zip(batch, results):
+            if job.future.done() or result is None:
+                continue
+            if isinstance(result, Exception):
+                job.future.set_exception(result)
+            else:
+                job.future.set_result(result)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Run a block of writes as one transaction with a single commit.
+
+        Inside the block ``execute``/``fetchone``/``fetchall`` use the writer
+        connection directly (so reads see the block's own writes). The block is
+        rolled back if it raises. Nested use joins the outer transaction.
+        """
+        if _in_transaction.get():
+            yield self
+            return
+        loop = asyncio.get_running_loop()
+        job = _TransactionJob(loop.create_future(), loop.create_future())
+        await self._write_queue.put(job)
+        try:
+            await job.granted
+        except BaseException:
+            job.released.set_result(None)
+            raise
+        token = _in_transaction.set(True)
+        try:
+            await self.db.execute("BEGIN")
+            yield self
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            raise
+        finally:
+            _in_transaction.reset(token)
+            job.released.set_result(None)
+
+    async def execute(self, query, params=()):
+        """Run a write on the writer connection and wait until it is committed.
+
+        Returns the (closed) cursor, so ``lastrowid``/``rowcount`` are available.
+        Inside ``transaction()`` the statement runs immediately and is committed
+        with the rest of the block.
+        """
+        if _in_transaction.get():
+            async with self.db.execute(query, params) as cursor:
+                logging.debug(f"Executed query in transaction: {query} with params: {params}")
+            return cursor
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put(_WriteJob(query, params, future))
+        try:
+            return await future
         except Exception as e:
             logging.error(f"Error executing query: {query} with params: {params}. Error: {e}")
             raise
 
+    async def executemany(self, query, seq_of_params):
+        """Run one statement for many parameter sets in a single transaction."""
+        async with self.transaction():
+            async with self.db.executemany(query, seq_of_params) as cursor:
+                logging.debug(f"Executed many: {query}")
+            return cursor
+
+    async def insert_many(self, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> List[int]:
+        """Insert ``rows`` into ``table`` in one transaction and return their ids in input order.
+
+        Rows are sent as multi-row ``VALUES`` statements chunked under SQLite's
+        host-parameter limit. ``table``/``columns`` are interpolated into SQL and
+        must be trusted identifiers, never user input.
+        """
+        rows = [tuple(r) for r in rows]
+        if not rows:
+            return []
+        cols = ", ".join(columns)
+        row_sql = "(" + ", ".join(["?"] * len(columns)) + ")"
+        chunk = max(1, SQLITE_MAX_VARIABLES // len(columns))
+        ids: List[int] = []
+        async with self.transaction():
+            for start in range(0, len(rows), chunk):
+                part = rows[start:start + chunk]
+                params = [value for row in part for value in row]
+                query = f"INSERT INTO {table} ({cols}) VALUES {', '.join([row_sql] * len(part))} RETURNING id"
+                async with self.db.execute(query, params) as cursor:
+                    returned = await cursor.fetchall()
+                # RETURNING order is unspecified; ids are allocated in VALUES order.
+                ids.extend(sorted(r[0] for r in returned))
+        return ids
+
+    @asynccontextmanager
+    async def _reader(self):
+        if _in_transaction.get():
+            yield self.db
+            return
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
     async def fetchall(self, query, params=()):
-        async with self.db.execute(query, params) as cursor:
-            return await cursor.fetchall()
+        async with self._reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                return await cursor.fetchall()
 
     async def fetchone(self, query, params=()):
-        async with self.db.execute(query, params) as cursor:
-            return await cursor.fetchone()
+        async with self._reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                return await cursor.fetchone()
+
+    async def iter_chunks(self, query, params=(), chunk_size: int = DB_ITER_CHUNK_SIZE) -> AsyncIterator[list]:
+        """Yield the result rows of ``query`` in lists of at most ``chunk_size``.
+
+        One read connection is held until the iteration finishes, so close the
+        generator (``contextlib.aclosing``) when stopping early, and don't read
+        through the pool inside the loop: once every reader is held that waits forever.
+        """
+        async with self._reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    async def close(self):
+        """Drain pending writes and close every connection."""
+        if self._writer_task is not None:
+            await self._write_queue.put(None)
+            await self._writer_task
+            self._writer_task = None
+        for reader in self._reader_conns:
+            await reader.close()
+        self._reader_conns.clear()
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+        if Database._instance is self:
+            Database._instance = None
+        logging.info("Database connections closed")
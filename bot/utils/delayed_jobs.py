@@ -0,0 +1,159 @@
+# bot/utils/delayed_jobs.py
+import asyncio
+import heapq
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from .database import Database
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# A failing handler is retried this many times, RETRY_DELAY seconds apart.
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 60.0
+MAX_CONCURRENT_JOBS = 8
+# How long a started job stays reserved for the process running it.
+CLAIM_SECONDS = 300.0
+
+
+class DelayedJobQueue:
+    """Durable one-shot jobs (snoozes etc.) backed by the ``scheduled_jobs`` table.
+
+    Pending jobs live in SQLite; in memory only a heap of ``(run_at, job_id)`` is
+    kept, and a single runner task sleeps until the earliest entry is due. A job's
+    kind and payload are read back when it fires, so thousands of snoozes cost a
+    few bytes each instead of a sleeping task holding its word list. ``start``
+    reloads every pending job, so nothing is lost across restarts.
+    """
+
+    _instance = None
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_JOBS):
+        self._handlers: Dict[str, Handler] = {}
+        self._heap: List[Tuple[float, int]] = []
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @staticmethod
+    def get_instance() -> "DelayedJobQueue":
+        if DelayedJobQueue._instance is None:
+            DelayedJobQueue._instance = DelayedJobQueue()
+        return DelayedJobQueue._instance
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self._handlers[kind] = handler
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    async def schedule(self, kind: str, when: Union[float, datetime], payload: Dict[str, Any]) -> int:
+        """Persist a job that runs ``handler(payload)`` at ``when`` (epoch seconds or aware datetime)."""
+        run_at = when.timestamp() if isinstance(when, datetime) else float(when)
+        db = await Database.get_instance()
+        cursor = await db.execute(
+            "INSERT INTO scheduled_jobs (kind, run_at, payload, created_at) VALUES (?, ?, ?, ?)",
+            (kind, run_at, json.dumps(payload), time.time()),
+        )
+        self._push(run_at, cursor.lastrowid)
+        return cursor.lastrowid
+
+    async def schedule_in(self, kind: str, delay: float, payload: Dict[str, Any]) -> int:
+        return await self.schedule(kind, time.time() + delay, payload)
+
+    async def cancel(self, job_id: int) -> None:
+        # The heap entry stays until it comes up and finds no row.
+        db = await Database.get_instance()
+        await db.execute("DELETE FROM scheduled_jobs WHERE id = ?", (job_id,))
+
+    def _push(self, run_at: float, job_id: int) -> None:
+        was_next = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (run_at, job_id))
+        if was_next is None or run_at < was_next:
+            self._wakeup.set()
+
+    async def start(self) -> int:
+        """Load pending jobs and start the runner; returns how many were restored."""
+        if self._runner is not None:
+            return len(self._heap)
+        db = await Database.get_instance()
+        rows = await db.fetchall("SELECT run_at, id FROM scheduled_jobs")
+        self._heap = [(run_at, job_id) for run_at, job_id in rows]
+        heapq.heapify(self._heap)
+        self._runner = asyncio.create_task(self._run())
+        logging.info(f"Delayed job queue started with {len(self._heap)} pending job(s)")
+        return len(self._heap)
+
+    def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        for task in list(self._running):
+            task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                # Wake for the head job, or earlier if a sooner job is pushed meanwhile.
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, job_id = heapq.heappop(self._heap)
+            task = asyncio.create_task(self._fire(job_id))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fire(self, job_id: int) -> None:
+        async with self._semaphore:
+            db = await Database.get_instance()
+            # Claim the job by pushing its run_at past CLAIM_SECONDS. With several bot
+            # processes only one wins; if it dies mid-job the others retry after the claim lapses.
+            now = time.time()
+            cursor = await db.execute(
+                "UPDATE scheduled_jobs SET run_at = ? WHERE id = ? AND run_at <= ?",
+                (now + CLAIM_SECONDS, job_id, now + 1),
+            )
+            if not cursor.rowcount:
+                row = await db.fetchone("SELECT run_at FROM scheduled_jobs WHERE id = ?", (job_id,))
+                if row is not None:
+                    self._push(row[0], job_id)  # claimed elsewhere or rescheduled
+                return
+            row = await db.fetchone("SELECT kind, payload, attempts FROM scheduled_jobs WHERE id = ?", (job_id,))
+            if row is None:
+                return  # cancelled
+            kind, payload, attempts = row
+            handler = self._handlers.get(kind)
+            if handler is None:
+                # Left in the table; it is picked up again once a handler is registered and the bot restarts.
+                logging.warning(f"No handler for delayed job {job_id} ({kind}); leaving it pending")
+                return
+            try:
+                await handler(json.loads(payload))
+            except Exception as e:
+                attempts += 1
+                if attempts < MAX_ATTEMPTS:
+                    logging.warning(f"Delayed job {job_id} ({kind}) failed: {e}; retrying in {RETRY_DELAY:.0f}s")
+                    run_at = time.time() + RETRY_DELAY
+                    await db.execute(
+                        "UPDATE scheduled_jobs SET attempts = ?, run_at = ? WHERE id = ?",
+                        (attempts, run_at, job_id),
+                    )
+                    self._push(run_at, job_id)
+                    return
+                logging.error(f"Delayed job {job_id} ({kind}) failed {attempts} times; dropping it: {e}")
+            await db.execute("DELETE FROM scheduled_jobs WHERE id = ?", (job_id,))
+
+
+def get_delayed_jobs() -> DelayedJobQueue:
+    return DelayedJobQueue.get_instance()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from .config import DM_CHANNEL_CACHE_SIZE, DM_CHANNEL_CACHE_TTL_SECONDS
+from .database import Database
+from .lru import LRUCache
+
+# Front tier: user_id -> DM channel id, so a warm fan-out never touches SQLite.
+_memory: LRUCache[int] = LRUCache(maxsize=DM_CHANNEL_CACHE_SIZE, ttl=DM_CHANNEL_CACHE_TTL_SECONDS or None)
+counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "invalidations": 0}
+
+
+async def get(user_id: int) -> Optional[int]:
+    """Return the known DM channel id for ``user_id`` or None."""
+    channel_id = _memory.get(user_id)
+    if channel_id is not None:
+        counters["memory_hits"] += 1
+        return channel_id
+    db = await Database.get_instance()
+    row = await db.fetchone("SELECT channel_id FROM dm_channels WHERE user_id = ?", (user_id,))
+    if row is None:
+        counters["misses"] += 1
+        return None
+    counters["db_hits"] += 1
+    _memory.set(user_id, row[0])
+    return row[0]
+
+
+async def put(user_id: int, channel_id: int) -> None:
+    if _memory.get(user_id) == channel_id:
+        return
+    db = await Database.get_instance()
+    await db.execute(
+        """
+        INSERT INTO dm_channels (user_id, channel_id, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET channel_id = excluded.channel_id, updated_at = excluded.updated_at
+        """,
+        (user_id, channel_id, time.time()),
+    )
+    _memory.set(user_id, channel_id)
+
+
+async def invalidate(user_id: int) -> None:
+    """Forget the channel after Discord rejected it (Forbidden / NotFound)."""
+    counters["invalidations"] += 1
+    _memory.pop(user_id)
+    db = await Database.get_instance()
+    await db.execute("DELETE FROM dm_channels WHERE user_id = ?", (user_id,))
+
+
+def stats() -> dict:
+    return {**counters, "memory_size": len(_memory)}
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import logging
+import re
+import time
+import unicodedata
+from typing import Optional
+
+from .config import KAISETU_CACHE_MAX_ROWS, KAISETU_CACHE_MEMORY_SIZE, KAISETU_CACHE_TTL_DAYS
+from .database import Database
+from .lru import LRUCache
+
+TTL_SECONDS = KAISETU_CACHE_TTL_DAYS * 86400
+
+# Front tier: hot explanations served without touching SQLite.
+_memory: LRUCache[str] = LRUCache(maxsize=KAISETU_CACHE_MEMORY_SIZE, ttl=TTL_SECONDS or None)
+# (tone, model) for which stale rows were last purged.
+_prepared_for: Optional[tuple] = None
+counters = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+
+def normalize_word(word: str) -> str:
+    """Fold width/case and collapse whitespace so "Take  Off" and "take off" share a key."""
+    text = unicodedata.normalize("NFKC", word or "")
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def cache_key(word: str, tone: str, model: str) -> str:
+    return f"{model}|{tone}|{normalize_word(word)}"
+
+
+async def _prepare(tone: str, model: str) -> None:
+    """Drop rows produced under another tone/model and rows past their TTL.
+
+    Keys already include tone and model, so stale rows can never be served; this
+    only keeps the table from carrying dead entries after PROMPT_TONE or the
+    model name changes.
+    """
+    global _prepared_for
+    if _prepared_for == (tone, model):
+        return
+    db = await Database.get_instance()
+    await db.execute("DELETE FROM kaisetu_cache WHERE tone != ? OR model != ?", (tone, model))
+    if TTL_SECONDS:
+        await db.execute("DELETE FROM kaisetu_cache WHERE created_at < ?", (time.time() - TTL_SECONDS,))
+    _memory.clear()
+    _prepared_for = (tone, model)
+    logging.info(f"kaisetu cache prepared for tone={tone}, model={model}")
+
+
+async def get(word: str, tone: str, model: str) -> Optional[str]:
+    """Return a cached explanation or None."""
+    await _prepare(tone, model)
+    key = cache_key(word, tone, model)
+    text = _memory.get(key)
+    if text is not None:
+        counters["memory_hits"] += 1
+        return text
+    db = await Database.get_instance()
+    now = time.time()
+    row = await db.fetchone(
+        "SELECT content, created_at FROM kaisetu_cache WHERE cache_key = ?",
+        (key,),
+    )
+    if row is None:
+        counters["misses"] += 1
+        return None
+    content, created_at = row
+    if TTL_SECONDS and created_at < now - TTL_SECONDS:
+        await db.execute("DELETE FROM kaisetu_cache WHERE cache_key = ?", (key,))
+        counters["misses"] += 1
+        return None
+    counters["db_hits"] += 1
+    await db.execute("UPDATE kaisetu_cache SET last_used_at = ? WHERE cache_key = ?", (now, key))
+    _memory.set(key, content, ttl=(created_at + TTL_SECONDS - now) if TTL_SECONDS else None)
+    return content
+
+
+async def put(word: str, tone: str, model: str, content: str) -> None:
+    """Store an explanation and evict least-recently-used rows beyond the size cap."""
+    await _prepare(tone, model)
+    key = cache_key(word, tone, model)
+    now = time.time()
+    db = await Database.get_instance()
+    await db.execute(
+        """
+        INSERT OR REPLACE INTO kaisetu_cache (cache_key, word, tone, model, content, created_at, last_used_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (key, normalize_word(word), tone, model, content, now, now),
+    )
+    await db.execute(
+        """
+        DELETE FROM kaisetu_cache WHERE cache_key IN (
+            SELECT cache_key FROM kaisetu_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+        )
+        """,
+        (KAISETU_CACHE_MAX_ROWS,),
+    )
+    _memory.set(key, content)
+
+
+def stats() -> dict:
+    return {**counters, "memory_size": len(_memory)}
@@ -0,0 +1,259 @@
+# bot/utils/fanout.py
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Union
+
+import discord
+
+from . import dm_channels
+from .config import DM_FANOUT_CONCURRENCY, DM_MAX_RETRIES, DM_RATE_BURST, DM_RATE_PER_SECOND
+
+# Outcomes reported for every job
+SENT = "sent"
+FORBIDDEN = "forbidden"  # DMs closed or bot blocked
+NOT_FOUND = "not_found"  # unknown user/channel
+FAILED = "failed"
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursting up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` (after a 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+
+@dataclass
+class DMJob:
+    """One DM to deliver. ``view_factory`` builds a fresh view per attempt."""
+
+    user_id: int
+    content: str
+    view_factory: Optional[Callable[[], discord.ui.View]] = None
+    meta: Any = None
+
+
+@dataclass
+class FanoutReport:
+    label: str = "dm"
+    sent: int = 0
+    forbidden: int = 0
+    not_found: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def attempted(self) -> int:
+        return self.sent + self.forbidden + self.not_found + self.failed
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def record(self, outcome: str, latency: float) -> None:
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        if outcome == SENT:
+            self.latencies.append(latency)
+
+    def summary(self) -> str:
+        return (
+            f"[{self.label}] attempted={self.attempted} sent={self.sent} forbidden={self.forbidden} "
+            f"not_found={self.not_found} failed={self.failed} 429s={self.rate_limited} "
+            f"elapsed={self.elapsed:.1f}s throughput={self.messages_per_second:.1f} msg/s "
+            f"latency p50={self.percentile(0.5) * 1000:.0f}ms p95={self.percentile(0.95) * 1000:.0f}ms"
+        )
+
+
+def _retry_after(error: Exception) -> float:
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            retry_after = float(headers.get("Retry-After", 1.0))
+        except (TypeError, ValueError):
+            retry_after = 1.0
+    return max(0.0, float(retry_after))
+
+
+class DMFanout:
+    """Delivers DMs to many users with bounded concurrency under a shared rate limit.
+
+    One bucket is shared by every fan-out of the process (daily reminders,
+    inactivity reminders, snoozes), so together they stay under Discord's global
+    limit. 429 responses pause the bucket for the advertised retry-after and the
+    job is retried up to ``max_retries`` times.
+    """
+
+    _instance = None
+
+    def __init__(
+        self,
+        client: discord.Client,
+        concurrency: int = DM_FANOUT_CONCURRENCY,
+        rate: float = DM_RATE_PER_SECOND,
+        burst: int = DM_RATE_BURST,
+        max_retries: int = DM_MAX_RETRIES,
+    ):
+        self.client = client
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+
+    @staticmethod
+    def get_instance(client: discord.Client) -> "DMFanout":
+        if DMFanout._instance is None or DMFanout._instance.client is not client:
+            DMFanout._instance = DMFanout(client)
+        return DMFanout._instance
+
+    async def _resolve_channel(self, user_id: int):
+        """Return ``(channel, cached)`` for the user's DM channel.
+
+        A channel id known from the DM channel cache is used directly, which costs
+        no REST call; otherwise the user and channel are looked up and remembered.
+        """
+        channel_id = await dm_channels.get(user_id)
+        if channel_id is not None:
+            return self.client.get_partial_messageable(channel_id, type=discord.ChannelType.private), True
+        user = self.client.get_user(user_id)
+        if user is None:
+            await self.bucket.acquire()
+            user = await self.client.fetch_user(user_id)
+        channel = user.dm_channel
+        if channel is None:
+            await self.bucket.acquire()
+            channel = await user.create_dm()
+        await dm_channels.put(user_id, channel.id)
+        return channel, False
+
+    async def send(self, job: DMJob, report: Optional[FanoutReport] = None) -> str:
+        """Deliver one DM; returns one of SENT/FORBIDDEN/NOT_FOUND/FAILED."""
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            cached = False
+            try:
+                channel, cached = await self._resolve_channel(job.user_id)
+                await self.bucket.acquire()
+                view = job.view_factory() if job.view_factory else None
+                await channel.send(job.content, view=view)
+                outcome = SENT
+                break
+            except discord.Forbidden:
+                await dm_channels.invalidate(job.user_id)
+                outcome = FORBIDDEN
+                break
+            except discord.NotFound:
+                await dm_channels.invalidate(job.user_id)
+                if cached:
+                    # stale channel id: resolve the user again before giving up
+                    continue
+                outcome = NOT_FOUND
+                break
+            except discord.RateLimited as e:
+                retry_after = _retry_after(e)
+            except discord.HTTPException as e:
+                if e.status != 429:
+                    logging.warning(f"HTTP error sending DM to {job.user_id}: {e}")
+                    outcome = FAILED
+                    break
+                retry_after = _retry_after(e)
+            except Exception as e:
+                logging.warning(f"Failed to send DM to user {job.user_id}: {e}")
+                outcome = FAILED
+                break
+            attempt += 1
+            if report is not None:
+                report.rate_limited += 1
+            if attempt > self.max_retries:
+                logging.warning(f"Giving up on DM to {job.user_id} after {attempt} rate-limited attempts")
+                outcome = FAILED
+                break
+            logging.info(f"Rate limited sending DM to {job.user_id}; retrying in {retry_after:.2f}s")
+            self.bucket.pause(retry_after)
+        if report is not None:
+            report.record(outcome, time.perf_counter() - started)
+        return outcome
+
+    async def run(
+        self,
+        jobs: Union[Iterable[DMJob], AsyncIterable[DMJob]],
+        label: str = "dm",
+        on_result: Optional[Callable[[DMJob, str], Awaitable[None]]] = None,
+    ) -> FanoutReport:
+        """Deliver every job from ``jobs`` (sync or async iterable) and report on the run.
+
+        Jobs are pulled lazily through a small bounded queue, so a streaming
+        producer is never read far ahead of what is being sent.
+        """
+        report = FanoutReport(label=label)
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker():
+            while True:
+                job = await queue.get()
+                if job is None:
+                    return
+                outcome = await self.send(job, report)
+                if on_result is not None:
+                    try:
+                        await on_result(job, outcome)
+                    except Exception as e:
+                        logging.error(f"Fan-out result handler failed for {job.user_id}: {e}")
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            if hasattr(jobs, "__aiter__"):
+                async for job in jobs:
+                    await queue.put(job)
+            else:
+                for job in jobs:
+                    await queue.put(job)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            report.elapsed = time.perf_counter() - started
+            logging.info(report.summary())
+        return report
+
+
+def get_dm_fanout(client: discord.Client) -> DMFanout:
+    return DMFanout.get_instance(client)
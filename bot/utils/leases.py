@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Set, Tuple
+
+from .config import LEASE_TTL_SECONDS, REMINDER_PARTITIONS, WORKER_ID
+from .database import Database
+
+
+async def claim(name: str, owner: str, ttl: float = LEASE_TTL_SECONDS) -> bool:
+    """Take or renew the lease ``name``; True if ``owner`` holds it afterwards.
+
+    A single UPSERT, so two workers racing for a free or expired lease cannot
+    both win: the update only applies when the row is ours or has expired.
+    """
+    now = time.time()
+    db = await Database.get_instance()
+    cursor = await db.execute(
+        """
+        INSERT INTO job_leases (name, owner, expires_at, heartbeat_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            owner = excluded.owner,
+            expires_at = excluded.expires_at,
+            heartbeat_at = excluded.heartbeat_at
+        WHERE job_leases.owner = excluded.owner OR job_leases.expires_at < ?
+        """,
+        (name, owner, now + ttl, now, now),
+    )
+    return cursor.rowcount > 0
+
+
+async def release(name: str, owner: str) -> None:
+    db = await Database.get_instance()
+    await db.execute("DELETE FROM job_leases WHERE name = ? AND owner = ?", (name, owner))
+
+
+async def count_live(prefix: str) -> int:
+    db = await Database.get_instance()
+    row = await db.fetchone(
+        "SELECT COUNT(*) FROM job_leases WHERE name >= ? AND name < ? AND expires_at >= ?",
+        (prefix, prefix + "￿", time.time()),
+    )
+    return row[0] if row else 0
+
+
+def partition_filter(column: str, count: int, held) -> Tuple[str, tuple]:
+    """SQL fragment (``AND ...``) restricting ``column`` to the held partitions."""
+    held = sorted(held)
+    if count <= 1 or len(held) >= count:
+        return "", ()
+    return f" AND ({column} % ?) IN ({','.join('?' * len(held))})", (count, *held)
+
+
+class PartitionLeases:
+    """Splits users into ``partitions`` (``user_id % partitions``) shared by all workers.
+
+    Every worker heartbeats a ``<prefix>:worker:<id>`` lease and holds at most its
+    fair share of ``<prefix>:<n>`` partition leases. ``rebalance`` (called every
+    few seconds) renews held leases, hands back surplus ones when workers join and
+    picks up partitions whose owner stopped heartbeating.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        partitions: int = REMINDER_PARTITIONS,
+        owner: str = WORKER_ID,
+        ttl: float = LEASE_TTL_SECONDS,
+    ):
+        self.prefix = prefix
+        self.partitions = max(1, partitions)
+        self.owner = owner
+        self.ttl = ttl
+        self.held: Set[int] = set()
+
+    def _name(self, partition: int) -> str:
+        return f"{self.prefix}:{partition}"
+
+    async def rebalance(self) -> Tuple[Set[int], Set[int]]:
+        """Renew, shed and claim leases; returns (gained, lost) partitions."""
+        gained: Set[int] = set()
+        lost: Set[int] = set()
+        await claim(f"{self.prefix}:worker:{self.owner}", self.owner, self.ttl)
+        workers = max(1, await count_live(f"{self.prefix}:worker:"))
+        share = math.ceil(self.partitions / workers)
+        for partition in sorted(self.held):
+            if not await claim(self._name(partition), self.owner, self.ttl):
+                self.held.discard(partition)
+                lost.add(partition)
+        for partition in sorted(self.held, reverse=True)[: max(0, len(self.held) - share)]:
+            await release(self._name(partition), self.owner)
+            self.held.discard(partition)
+            lost.add(partition)
+        for partition in range(self.partitions):
+            if len(self.held) >= share:
+                break
+            if partition not in self.held and await claim(self._name(partition), self.owner, self.ttl):
+                self.held.add(partition)
+                gained.add(partition)
+        return gained, lost
+
+    def filter(self, column: str, held=None) -> Tuple[str, tuple]:
+        return partition_filter(column, self.partitions, self.held if held is None else held)
+
+    async def release_all(self) -> None:
+        for partition in list(self.held):
+            await release(self._name(partition), self.owner)
+        self.held.clear()
+        await release(f"{self.prefix}:worker:{self.owner}", self.owner)
@@ -0,0 +1,211 @@
+# bot/utils/llm.py
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Optional
+
+from .config import (
+    GEMINI_MODEL_NAME,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_WORKERS,
+    LLM_TIMEOUT_SECONDS,
+    get_gemini_model,
+)
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when a generation is requested but Gemini is disabled."""
+
+
+class LLMService:
+    """Shared async front for the (blocking) Gemini client.
+
+    google-generativeai only offers a synchronous ``generate_content``; calling it
+    from a coroutine stalls the whole discord.py event loop. Every call is instead
+    run on a small bounded thread pool, capped by a semaphore and a per-call timeout,
+    so a slow generation only ever occupies a worker thread.
+
+    Calls that pass a ``key`` are single-flighted: while a generation for that key
+    is in flight, identical requests await the same result instead of calling
+    Gemini again. ``stream`` yields partial text as Gemini produces it.
+    """
+
+    _instance = None
+
+    def __init__(
+        self,
+        model=None,
+        model_name: str = GEMINI_MODEL_NAME,
+        max_workers: int = LLM_MAX_WORKERS,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+    ):
+        self.model = model
+        self.model_name = model_name
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counters = {"requests": 0, "generations": 0, "streams": 0, "coalesced": 0, "failures": 0, "timeouts": 0}
+        logging.info(
+            f"LLM service created (model={model_name}, workers={max_workers}, "
+            f"concurrency={max_concurrency}, timeout={timeout}s, enabled={model is not None})"
+        )
+
+    @staticmethod
+    def get_instance() -> "LLMService":
+        if LLMService._instance is None:
+            LLMService._instance = LLMService(model=get_gemini_model(GEMINI_MODEL_NAME))
+        return LLMService._instance
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def _generate_blocking(self, prompt: str, timeout: float) -> str:
+        # Runs on a worker thread. The request timeout lets the SDK give up on its own,
+        # so a timed-out call does not keep holding the worker.
+        response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        return response.text
+
+    async def _generate(self, prompt: str, timeout: float) -> str:
+        loop = asyncio.get_running_loop()
+        self.counters["generations"] += 1
+        try:
+            async with self._semaphore:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, self._generate_blocking, prompt, timeout),
+                    timeout=timeout,
+                )
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise
+        except Exception:
+            self.counters["failures"] += 1
+            raise
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None, key: Optional[str] = None) -> str:
+        """Generate text for ``prompt`` without blocking the event loop.
+
+        When ``key`` is given, concurrent calls with the same key share one
+        generation. Raises LLMUnavailableError when Gemini is disabled and
+        asyncio.TimeoutError when the call exceeds ``timeout`` (defaults to
+        LLM_TIMEOUT_SECONDS).
+        """
+        if not self.available:
+            raise LLMUnavailableError("Gemini is not configured")
+        timeout = timeout or self.timeout
+        self.counters["requests"] += 1
+        if key is None:
+            return await self._generate(prompt, timeout)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate(prompt, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_flight_done(k, t))
+        else:
+            self.counters["coalesced"] += 1
+        # shield: one caller giving up must not cancel the generation others await
+        return await asyncio.shield(task)
+
+    def _stream_blocking(self, prompt: str, timeout: float, push, stop: threading.Event) -> None:
+        # Runs on a worker thread; hands every chunk back to the loop through ``push``.
+        try:
+            response = self.model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+            for chunk in response:
+                if stop.is_set():
+                    break
+                text = chunk.text
+                if text:
+                    push(("chunk", text))
+        except Exception as e:
+            push(("error", e))
+        else:
+            push(("done", None))
+
+    async def _stream(self, prompt: str, timeout: float, flight: Optional[asyncio.Future]) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        parts = []
+        error: Optional[BaseException] = None
+        completed = False
+        self.counters["streams"] += 1
+        try:
+            async with self._semaphore:
+                deadline = loop.time() + timeout
+                loop.run_in_executor(
+                    self._executor,
+                    self._stream_blocking,
+                    prompt,
+                    timeout,
+                    lambda item: loop.call_soon_threadsafe(queue.put_nowait, item),
+                    stop,
+                )
+                while True:
+                    kind, value = await asyncio.wait_for(queue.get(), timeout=max(0.0, deadline - loop.time()))
+                    if kind == "done":
+                        completed = True
+                        break
+                    if kind == "error":
+                        raise value
+                    parts.append(value)
+                    yield value
+        except asyncio.TimeoutError as e:
+            self.counters["timeouts"] += 1
+            error = e
+            raise
+        except Exception as e:
+            self.counters["failures"] += 1
+            error = e
+            raise
+        finally:
+            stop.set()
+            if flight is not None and not flight.done():
+                if completed:
+                    flight.set_result("".join(parts))
+                else:
+                    flight.set_exception(error or RuntimeError("stream abandoned before completion"))
+
+    async def stream(self, prompt: str, timeout: Optional[float] = None, key: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield the generation for ``prompt`` chunk by chunk.
+
+        ``timeout`` bounds the whole stream. With a ``key``, a request that joins a
+        generation already in flight waits for it and receives the full text as a
+        single chunk; a stream started here likewise satisfies later ``generate``
+        or ``stream`` calls for the same key.
+        """
+        if not self.available:
+            raise LLMUnavailableError("Gemini is not configured")
+        timeout = timeout or self.timeout
+        self.counters["requests"] += 1
+        flight = None
+        if key is not None:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                self.counters["coalesced"] += 1
+                yield await asyncio.shield(existing)
+                return
+            flight = asyncio.get_running_loop().create_future()
+            self._inflight[key] = flight
+            flight.add_done_callback(lambda t, k=key: self._on_flight_done(k, t))
+        async for chunk in self._stream(prompt, timeout, flight):
+            yield chunk
+
+    def _on_flight_done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def stats(self) -> dict:
+        return {**self.counters, "inflight": len(self._inflight)}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logging.info("LLM service shut down")
+
+
+def get_llm_service() -> LLMService:
+    return LLMService.get_instance()
@@ -0,0 +1,368 @@
+# bot/utils/migrations.py
+"""Ordered, versioned schema migrations.
+
+Each migration runs once, in its own transaction, and records its version in
+``schema_version``. Steps are SQL strings or ``async def step(db)`` callables and
+should be written idempotently (``IF NOT EXISTS`` etc.) so that databases created
+before the migration runner existed upgrade cleanly.
+"""
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Sequence, Union
+
+import aiosqlite
+
+from .schedule import JST, day_number, parse_day
+
+Step = Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    steps: Sequence[Step]
+
+
+async def _has_column(db: aiosqlite.Connection, table: str, column: str) -> bool:
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        return any(row[1] == column for row in await cursor.fetchall())
+
+
+async def _add_column(db: aiosqlite.Connection, table: str, column: str, decl: str) -> None:
+    if not await _has_column(db, table, column):
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+# The fixed schedule (days after registration) in use when migration 3 ran. Frozen
+# here so the backfill stays reproducible; scheduling now lives in srs.py.
+_LEGACY_INTERVALS = (1, 4, 10, 17, 30, 60)
+
+
+def _legacy_next_due_day(added_day: int, today: int) -> Optional[int]:
+    for iv in _LEGACY_INTERVALS:
+        if added_day + iv >= today:
+            return added_day + iv
+    return None
+
+
+async def _add_next_due_day(db: aiosqlite.Connection) -> None:
+    """Add words.next_due_day and backfill it from added_at.
+
+    Backfilled words get their next scheduled day from today on, so words whose
+    interval day already passed are not all due at once after the upgrade.
+    """
+    await _add_column(db, "words", "next_due_day", "INTEGER")
+    today = day_number(datetime.now(JST))
+    async with db.execute("SELECT id, added_at, intervals_remaining FROM words") as cursor:
+        rows = await cursor.fetchall()
+    updates = []
+    for word_id, added_at, intervals_remaining in rows:
+        added_day = parse_day(added_at) if added_at else None
+        if intervals_remaining == "done" or added_day is None:
+            due = None
+        else:
+            due = _legacy_next_due_day(added_day, today)
+        updates.append((due, word_id))
+    await db.executemany("UPDATE words SET next_due_day = ? WHERE id = ?", updates)
+
+
+async def _add_word_stats_review_state(db: aiosqlite.Connection) -> None:
+    # Existing stats start as "never reviewed"; their words keep their stored next_due_day.
+    await _add_column(db, "word_stats", "reps", "INTEGER NOT NULL DEFAULT 0")
+    await _add_column(db, "word_stats", "interval_days", "INTEGER")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "base tables",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS words (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                word TEXT,
+                meaning TEXT,
+                added_at TEXT,
+                intervals_remaining TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS word_stats (
+                word_id INTEGER PRIMARY KEY,
+                attempts INTEGER DEFAULT 0,
+                correct INTEGER DEFAULT 0,
+                last_seen TEXT,
+                ease REAL DEFAULT 2.5
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS kaisetu_cache (
+                cache_key TEXT PRIMARY KEY,
+                word TEXT,
+                tone TEXT,
+                model TEXT,
+                content TEXT,
+                created_at REAL,
+                last_used_at REAL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_kaisetu_cache_last_used ON kaisetu_cache(last_used_at)",
+        ],
+    ),
+    Migration(
+        2,
+        "words lookup indexes",
+        [
+            # mention registration / delete: WHERE user_id = ? AND word = ?
+            "CREATE INDEX IF NOT EXISTS idx_words_user_word ON words(user_id, word)",
+            # show / fetch_user_words: WHERE user_id = ? ORDER BY id (rowid order within user)
+            "CREATE INDEX IF NOT EXISTS idx_words_user_id ON words(user_id)",
+            # inactivity check: WHERE date(added_at) = date(?)
+            "CREATE INDEX IF NOT EXISTS idx_words_added_date ON words(date(added_at))",
+        ],
+    ),
+    Migration(
+        3,
+        "words.next_due_day",
+        [
+            _add_next_due_day,
+            # daily reminder: WHERE next_due_day <= ? (all users)
+            "CREATE INDEX IF NOT EXISTS idx_words_next_due ON words(next_due_day, user_id)",
+            # /review, /progress: WHERE user_id = ? AND next_due_day <= ?
+            "CREATE INDEX IF NOT EXISTS idx_words_user_due ON words(user_id, next_due_day)",
+        ],
+    ),
+    Migration(
+        4,
+        "reminder outbox",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS reminder_outbox (
+                run_date TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL,
+                PRIMARY KEY (run_date, kind, user_id)
+            ) WITHOUT ROWID
+            """,
+        ],
+    ),
+    Migration(
+        5,
+        "dm channel cache",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS dm_channels (
+                user_id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                updated_at REAL
+            )
+            """,
+        ],
+    ),
+    Migration(
+        6,
+        "per-user reminder settings",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS user_settings (
+                user_id INTEGER PRIMARY KEY,
+                timezone TEXT NOT NULL DEFAULT 'Asia/Tokyo',
+                remind_minute INTEGER NOT NULL DEFAULT 1260,
+                updated_at REAL
+            )
+            """,
+            # reminder slots: WHERE timezone = ? AND remind_minute = ? (users in user_id order)
+            "CREATE INDEX IF NOT EXISTS idx_user_settings_slot ON user_settings(timezone, remind_minute, user_id)",
+            # existing users keep the old 21:00 JST schedule
+            "INSERT OR IGNORE INTO user_settings (user_id) SELECT DISTINCT user_id FROM words",
+        ],
+    ),
+    Migration(
+        7,
+        "delayed jobs",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                -- AUTOINCREMENT: ids of cancelled jobs must never be reused by new ones
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                run_at REAL NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL
+            )
+            """,
+        ],
+    ),
+    Migration(
+        8,
+        "user activity",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS user_activity (
+                user_id INTEGER PRIMARY KEY,
+                word_count INTEGER NOT NULL DEFAULT 0,
+                last_added_at REAL,
+                updated_at REAL
+            )
+            """,
+            # inactivity reminder (all users): WHERE last_added_at < ?
+            "CREATE INDEX IF NOT EXISTS idx_user_activity_last_added ON user_activity(last_added_at)",
+            """
+            INSERT OR REPLACE INTO user_activity (user_id, word_count, last_added_at, updated_at)
+            SELECT user_id, COUNT(*), MAX(CAST(strftime('%s', added_at) AS INTEGER)), CAST(strftime('%s', 'now') AS INTEGER) FROM words GROUP BY user_id
+            """,
+        ],
+    ),
+    Migration(
+        9,
+        "job leases",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS job_leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                heartbeat_at REAL
+            ) WITHOUT ROWID
+            """,
+        ],
+    ),
+    Migration(
+        10,
+        "recurring job markers",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS job_runs (
+                name TEXT PRIMARY KEY,
+                last_run_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """,
+        ],
+    ),
+    Migration(
+        11,
+        "adaptive review state",
+        [
+            _add_word_stats_review_state,
+        ],
+    ),
+    Migration(
+        12,
+        "review log",
+        [
+            # One row per answer: rowid + four integers (result: see review_log.ReviewResult).
+            """
+            CREATE TABLE IF NOT EXISTS review_log (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                word_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                result INTEGER NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_review_log_word ON review_log(word_id)",
+            # Per-user daily totals of pruned events (day = ts // 86400, UTC)
+            """
+            CREATE TABLE IF NOT EXISTS review_daily (
+                user_id INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                attempts INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                PRIMARY KEY (user_id, day)
+            ) WITHOUT ROWID
+            """,
+            # Review state folded from pruned events; replay starts from here
+            """
+            CREATE TABLE IF NOT EXISTS review_checkpoint (
+                word_id INTEGER PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                ease REAL NOT NULL,
+                reps INTEGER NOT NULL,
+                interval_days INTEGER,
+                last_ts INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """,
+            # Stats recorded before the log existed become the checkpoint replay starts from;
+            # last_ts 0 stands for "answered, time unknown"
+            """
+            INSERT OR IGNORE INTO review_checkpoint (word_id, attempts, correct, ease, reps, interval_days, last_ts)
+            SELECT ws.word_id, ws.attempts, COALESCE(ws.correct, 0), COALESCE(ws.ease, 2.5), ws.reps, ws.interval_days,
+                   COALESCE(CAST(strftime('%s', ws.last_seen) AS INTEGER), 0)
+            FROM word_stats ws JOIN words w ON w.id = ws.word_id
+            WHERE ws.attempts > 0
+            """,
+        ],
+    ),
+    Migration(
+        13,
+        "drop unused words index",
+        [
+            # The inactivity check reads user_activity (migration 8); nothing filters on
+            # date(added_at) any more, so every insert was maintaining it for nothing.
+            # Due lists stay on idx_words_next_due / idx_words_user_due.
+            "DROP INDEX IF EXISTS idx_words_added_date",
+        ],
+    ),
+]
+
+
+async def current_version(db: aiosqlite.Connection) -> int:
+    async with db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version") as cursor:
+        row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+async def run_migrations(db: aiosqlite.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    """Apply pending migrations in version order; returns the resulting version."""
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at TEXT
+        )
+        """
+    )
+    await db.commit()
+    version = await current_version(db)
+    pending = sorted((m for m in migrations if m.version > version), key=lambda m: m.version)
+    if not pending:
+        logging.info(f"Database schema is up to date (version {version})")
+        return version
+    started = time.perf_counter()
+    for migration in pending:
+        step_started = time.perf_counter()
+        try:
+            await db.execute("BEGIN")
+            for step in migration.steps:
+                if isinstance(step, str):
+                    await db.execute(step)
+                else:
+                    await step(db)
+            await db.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (migration.version, migration.name, datetime.now(timezone.utc).isoformat()),
+            )
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logging.error(f"Migration {migration.version} ({migration.name}) failed: {e}")
+            raise
+        version = migration.version
+        logging.info(
+            f"Applied migration {migration.version} ({migration.name}) "
+            f"in {(time.perf_counter() - step_started) * 1000:.1f} ms"
+        )
+    logging.info(
+        f"Database schema migrated to version {version} "
+        f"({len(pending)} migration(s), {(time.perf_counter() - started) * 1000:.1f} ms)"
+    )
+    return version
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from .config import OUTBOX_MAX_ATTEMPTS, OUTBOX_RETENTION_DAYS
+from .database import Database
+
+# Delivery states. A user in a terminal state is never messaged again for that run.
+SENT = "sent"
+FAILED = "failed"
+FORBIDDEN = "forbidden"
+NOT_FOUND = "not_found"
+TERMINAL_STATES = (SENT, FORBIDDEN, NOT_FOUND)
+
+# Reminder kinds
+DAILY = "daily"
+INACTIVE = "inactive"
+
+
+def _slot_filter(
+    timezone: Optional[str], remind_minute: Optional[int], partition_sql: Tuple[str, tuple]
+) -> Tuple[str, tuple]:
+    """SQL narrowing outbox rows to one reminder slot (and partitions), or nothing for a whole-day run."""
+    if timezone is None:
+        return "", ()
+    partition_clause, partition_params = partition_sql
+    return (
+        f" AND user_id IN (SELECT s.user_id FROM user_settings s WHERE s.timezone = ? AND s.remind_minute = ?{partition_clause})",
+        (timezone, remind_minute, *partition_params),
+    )
+
+
+async def settled_users(
+    run_date: date,
+    kind: str,
+    timezone: Optional[str] = None,
+    remind_minute: Optional[int] = None,
+    partition_sql: Tuple[str, tuple] = ("", ()),
+) -> Set[int]:
+    """Users who need no further delivery for this run.
+
+    That is everyone already delivered (or undeliverable) plus everyone whose
+    failures reached OUTBOX_MAX_ATTEMPTS. With ``timezone``/``remind_minute`` only
+    that slot's users are read (``partition_sql`` filters ``s.user_id``), so a slot
+    run doesn't reload everyone settled earlier in the day.
+    """
+    slot_clause, slot_params = _slot_filter(timezone, remind_minute, partition_sql)
+    db = await Database.get_instance()
+    rows = await db.fetchall(
+        f"""
+        SELECT user_id FROM reminder_outbox
+        WHERE run_date = ? AND kind = ?
+          AND (status IN ({",".join("?" * len(TERMINAL_STATES))}) OR attempts >= ?){slot_clause}
+        """,
+        (run_date.isoformat(), kind, *TERMINAL_STATES, OUTBOX_MAX_ATTEMPTS, *slot_params),
+    )
+    return {row[0] for row in rows}
+
+
+async def record(run_date: date, kind: str, user_id: int, status: str, error: Optional[str] = None) -> None:
+    """Record one delivery attempt and its outcome."""
+    db = await Database.get_instance()
+    await db.execute(
+        """
+        INSERT INTO reminder_outbox (run_date, kind, user_id, status, attempts, last_error, updated_at)
+        VALUES (?, ?, ?, ?, 1, ?, ?)
+        ON CONFLICT(run_date, kind, user_id) DO UPDATE SET
+            status = excluded.status,
+            attempts = reminder_outbox.attempts + 1,
+            last_error = excluded.last_error,
+            updated_at = excluded.updated_at
+        """,
+        (run_date.isoformat(), kind, user_id, status, error, time.time()),
+    )
+
+
+async def delivery_report(
+    run_date: date,
+    kind: str,
+    timezone: Optional[str] = None,
+    remind_minute: Optional[int] = None,
+    partition_sql: Tuple[str, tuple] = ("", ()),
+) -> Dict[str, int]:
+    """Status -> user count for one run (or one slot of it, as in ``settled_users``)."""
+    slot_clause, slot_params = _slot_filter(timezone, remind_minute, partition_sql)
+    db = await Database.get_instance()
+    rows = await db.fetchall(
+        f"SELECT status, COUNT(*) FROM reminder_outbox WHERE run_date = ? AND kind = ?{slot_clause} GROUP BY status",
+        (run_date.isoformat(), kind, *slot_params),
+    )
+    return {status: count for status, count in rows}
+
+
+def format_report(report: Dict[str, int]) -> str:
+    return ", ".join(f"{status}={count}" for status, count in sorted(report.items())) or "no deliveries"
+
+
+async def prune(today: date, retention_days: int = OUTBOX_RETENTION_DAYS) -> None:
+    db = await Database.get_instance()
+    cutoff = (today - timedelta(days=retention_days)).isoformat()
+    await db.execute("DELETE FROM reminder_outbox WHERE run_date < ?", (cutoff,))
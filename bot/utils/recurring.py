@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from .database import Database
+
+# Recurring jobs run on one AsyncIOScheduler. Each records when it last completed
+# in ``job_runs`` so a start-up after downtime can tell whether a run was missed.
+
+
+async def last_run(name: str) -> Optional[float]:
+    db = await Database.get_instance()
+    row = await db.fetchone("SELECT last_run_at FROM job_runs WHERE name = ?", (name,))
+    return row[0] if row else None
+
+
+async def mark_run(name: str, when: Optional[float] = None) -> None:
+    """Record a completed run; markers only move forward."""
+    db = await Database.get_instance()
+    await db.execute(
+        """
+        INSERT INTO job_runs (name, last_run_at) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET last_run_at = MAX(job_runs.last_run_at, excluded.last_run_at)
+        """,
+        (name, time.time() if when is None else when),
+    )
+
+
+async def add_recurring(
+    scheduler: AsyncIOScheduler,
+    name: str,
+    func: Callable[[], Awaitable[None]],
+    trigger,
+    misfire_grace_time: int = 60,
+    catch_up: bool = True,
+) -> None:
+    """Schedule ``func`` on ``trigger`` with coalescing and a persisted last-run marker.
+
+    If ``catch_up`` is set and the trigger fired at least once between the stored
+    marker and now (the bot was down), one extra run is started immediately;
+    however many fire times were missed, they coalesce into that single run.
+    """
+
+    async def run():
+        await func()
+        await mark_run(name)
+
+    scheduler.add_job(
+        run,
+        trigger,
+        id=name,
+        name=name,
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=misfire_grace_time,
+    )
+    if not catch_up:
+        return
+    previous = await last_run(name)
+    if previous is None:
+        await mark_run(name)  # first start: nothing can have been missed yet
+        return
+    now = datetime.now(timezone.utc)
+    missed = trigger.get_next_fire_time(None, datetime.fromtimestamp(previous, timezone.utc) + timedelta(seconds=1))
+    if missed is not None and missed <= now:
+        logging.info(f"Recurring job {name} missed its run at {missed}; catching up once")
+        scheduler.add_job(run, id=f"{name}:catch_up", name=f"{name} (catch-up)", replace_existing=True)
@@ -1,17 +1,21 @@
 import discord
 from typing import List, Tuple, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 import random
 
-from .database import Database
-from .stats import record_result
+from .stats import get_stats_buffer
+from . import dm_channels
+from .delayed_jobs import get_delayed_jobs
+
+SNOOZE_JOB = "snooze"
+SNOOZE_SECONDS = 3600
 
 
 class ReviewSession(discord.ui.View):
     """Interactive review for a user's words in DMs.
 
-    Steps through (id, word, meaning) items with buttons to show answer and mark learned.
+    Steps through (id, word, meaning) items with buttons to show the answer and grade it.
     """
 
     def __init__(self, user_id: int, items: List[Tuple[int, str, str]], timeout: Optional[float] = 300):
@@ -62,14 +66,9 @@ class ReviewSession(discord.ui.View):
         if interaction.user.id != self.user_id:
             await interaction.response.send_message("これは発行者だけのセッションだよ！", ephemeral=True)
             return
-        # Mark as learned by setting intervals_remaining='done'
-        try:
-            _id, _, _ = self.items[self.index]
-            db = await Database.get_instance()
-            await db.execute("UPDATE words SET intervals_remaining = 'done' WHERE id = ? AND user_id = ?", (_id, self.user_id))
-            await record_result(_id, True, datetime.utcnow())
-        except Exception as e:
-            logging.error(f"Failed to mark learned: {e}")
+        # A correct review: the scheduler spaces the word out; written by the stats buffer, not awaited here
+        _id, _, _ = self.items[self.index]
+        get_stats_buffer().add(self.user_id, _id, True, datetime.now(timezone.utc))
         # Advance (meaning already visible)
         self.correct += 1
         self.index += 1
@@ -86,6 +85,7 @@ class ReviewSession(discord.ui.View):
             )
             await interaction.response.edit_message(content=summary, view=self)
             self.stop()
+            get_stats_buffer().request_flush()
             return
         self._update_button_states()
         await interaction.response.edit_message(content=self.current_prompt(), view=self)
@@ -94,12 +94,9 @@ class ReviewSession(discord.ui.View):
         if interaction.user.id != self.user_id:
             await interaction.response.send_message("これは発行者だけのセッションだよ！", ephemeral=True)
             return
-        # Do not change DB; just advance
-        try:
-            _id, _, _ = self.items[self.index]
-            await record_result(_id, False, datetime.utcnow())
-        except Exception as e:
-            logging.error(f"Failed to record incorrect: {e}")
+        # Only the stats change (buffered); just advance
+        _id, _, _ = self.items[self.index]
+        get_stats_buffer().add(self.user_id, _id, False, datetime.now(timezone.utc))
         self.incorrect += 1
         self.index += 1
         self.answer_shown = False
@@ -115,6 +112,7 @@ class ReviewSession(discord.ui.View):
             )
             await interaction.response.edit_message(content=summary, view=self)
             self.stop()
+            get_stats_buffer().request_flush()
             return
         self._update_button_states()
         await interaction.response.edit_message(content=self.current_prompt(), view=self)
@@ -128,6 +126,10 @@ class ReviewSession(discord.ui.View):
                 item.disabled = True
         await interaction.response.edit_message(content="また続きやろうね！", view=self)
         self.stop()
+        get_stats_buffer().request_flush()
+
+    async def on_timeout(self):
+        get_stats_buffer().request_flush()
 
 
 class ReminderView(discord.ui.View):
@@ -160,38 +162,18 @@ class ReminderView(discord.ui.View):
             await interaction.response.send_message("これは発行者だけが使えるよ！", ephemeral=True)
             return
         await interaction.response.send_message("1時間後にまた声かけるね！", ephemeral=True)
-        # Schedule a simple delayed reminder in DM
-        async def delayed_send():
-            try:
-                await discord.utils.sleep_until(datetime.utcnow().replace(microsecond=0) + discord.utils.utcnow().tzinfo.utcoffset(datetime.utcnow()) if False else datetime.utcnow())
-            except Exception:
-                pass
-        # Use create_task with asyncio.sleep for portability
-        import asyncio
-
-        async def task():
-            try:
-                await asyncio.sleep(3600)
-                user = interaction.client.get_user(self.user_id)
-                if not user:
-                    try:
-                        user = await interaction.client.fetch_user(self.user_id)
-                    except Exception:
-                        user = None
-                if user:
-                    try:
-                        channel = user.dm_channel or await user.create_dm()
-                        msg = "お兄ちゃん、さっきの続きやろっ！"
-                        view = ReminderView(self.user_id, self.items, self.tzlabel)
-                        await channel.send(msg, view=view)
-                    except discord.Forbidden:
-                        logging.info(f"User {self.user_id} has DMs disabled; skipping snooze DM.")
-                    except Exception as e:
-                        logging.warning(f"Snooze DM failed for {self.user_id}: {e}")
-            except Exception as e:
-                logging.error(f"Snooze scheduling task errored: {e}")
-
-        asyncio.create_task(task())
+        if interaction.guild_id is None and interaction.channel_id is not None:
+            # The button was pressed in the DM itself, so the snooze goes straight back there.
+            await dm_channels.put(self.user_id, interaction.channel_id)
+        # Persisted, so the snooze survives a restart; the Reminders cog delivers it.
+        try:
+            await get_delayed_jobs().schedule_in(
+                SNOOZE_JOB,
+                SNOOZE_SECONDS,
+                {"user_id": self.user_id, "word_ids": [item[0] for item in self.items]},
+            )
+        except Exception as e:
+            logging.error(f"Failed to schedule snooze for {self.user_id}: {e}")
 
 
 # ----- Text-command quiz session (DM) -----
@@ -223,18 +205,14 @@ async def quiz_memorized(user_id: int) -> str:
     if not st or not st.items:
         return "いま進行中のクイズはないみたい。/復習 や /クイズ で始めてね！"
     _id, word, meaning = st.items[st.index]
-    try:
-        db = await Database.get_instance()
-        await db.execute("UPDATE words SET intervals_remaining = 'done' WHERE id = ? AND user_id = ?", (_id, user_id))
-        await record_result(_id, True, datetime.utcnow())
-    except Exception:
-        pass
+    get_stats_buffer().add(user_id, _id, True, datetime.now(timezone.utc))
     st.correct += 1
     st.index += 1
     if st.index >= len(st.items):
         total = st.correct + st.incorrect
         rate = int((st.correct / total) * 100) if total else 0
         del _QUIZ_SESSIONS[user_id]
+        get_stats_buffer().request_flush()
         return (
             f"正解！『{word}』= {meaning}\n\nおつかれさま！クイズおしまいっ！\n"
             f"・正解: {st.correct} / 不正解: {st.incorrect} / 合計: {total}（正答率 {rate}%）"
@@ -247,16 +225,14 @@ async def quiz_forgot(user_id: int) -> str:
     if not st or not st.items:
         return "いま進行中のクイズはないみたい。/復習 や /クイズ で始めてね！"
     _id, word, meaning = st.items[st.index]
-    try:
-        await record_result(_id, False, datetime.utcnow())
-    except Exception:
-        pass
+    get_stats_buffer().add(user_id, _id, False, datetime.now(timezone.utc))
     st.incorrect += 1
     st.index += 1
     if st.index >= len(st.items):
         total = st.correct + st.incorrect
         rate = int((st.correct / total) * 100) if total else 0
         del _QUIZ_SESSIONS[user_id]
+        get_stats_buffer().request_flush()
         return (
             f"残念… 正解は『{word}』= {meaning} だよ\n\n今日はここまで！また一緒にがんばろうね！\n"
             f"・正解: {st.correct} / 不正解: {st.incorrect} / 合計: {total}（正答率 {rate}%）"
@@ -268,6 +244,7 @@ def quiz_stop(user_id: int) -> str:
     st = _QUIZ_SESSIONS.pop(user_id, None)
     if not st:
         return "いま進行中のクイズはないみたい。/復習 や /クイズ で始めてね！"
+    get_stats_buffer().request_flush()
     total = st.correct + st.incorrect
     return (
         "途中で終了したよ！\n"
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .config import REVIEW_LOG_RETENTION_DAYS
+from .database import Database
+from .schedule import day_number
+from . import srs
+
+# Append-only history of review answers, written by stats.apply_results in the same
+# transaction as word_stats. Old days are folded away by ``prune``: per-user daily
+# totals go to review_daily (learning curves) and each word's state at the cut goes
+# to review_checkpoint, so ``replay`` can recompute word_stats from checkpoint + log.
+
+DAY_SECONDS = 86400
+
+
+class ReviewResult(IntEnum):
+    FORGOT = 0
+    CORRECT = 1
+    LEARNED = 2  # correct, and the word was retired
+
+
+class History(NamedTuple):
+    attempts: int
+    correct: int
+    state: srs.ReviewState
+    last_ts: Optional[int]
+
+
+EMPTY = History(0, 0, srs.NEW, None)
+
+LogRow = Tuple[int, int, int, int]  # (user_id, word_id, ts, result)
+
+
+def fold(history: History, ts: int, result: int) -> History:
+    """Apply one logged answer with the current scheduler."""
+    ok = result != ReviewResult.FORGOT
+    return History(
+        history.attempts + 1,
+        history.correct + (1 if ok else 0),
+        srs.review(history.state, ok),
+        ts,
+    )
+
+
+async def append(rows: Sequence[LogRow]) -> None:
+    """Append answers; inside ``db.transaction()`` they commit with the caller's writes."""
+    if not rows:
+        return
+    db = await Database.get_instance()
+    await db.executemany("INSERT INTO review_log (user_id, word_id, ts, result) VALUES (?, ?, ?, ?)", rows)
+
+
+def rows_for(results: Iterable) -> List[LogRow]:
+    """review_log rows for ``stats.Result`` entries."""
+    return [
+        (
+            r.user_id,
+            r.word_id,
+            int(r.when.timestamp()),
+            int(ReviewResult.LEARNED if r.learned else ReviewResult.CORRECT if r.correct else ReviewResult.FORGOT),
+        )
+        for r in results
+    ]
+
+
+async def _load_checkpoints(db, where: str, params: tuple) -> Dict[int, History]:
+    rows = await db.fetchall(
+        f"SELECT word_id, attempts, correct, ease, reps, interval_days, last_ts FROM review_checkpoint WHERE {where}",
+        params,
+    )
+    return {
+        word_id: History(attempts, correct, srs.ReviewState(reps, interval_days, ease), last_ts)
+        for word_id, attempts, correct, ease, reps, interval_days, last_ts in rows
+    }
+
+
+async def prune(now: Optional[float] = None, retention_days: int = REVIEW_LOG_RETENTION_DAYS) -> int:
+    """Fold whole UTC days older than ``retention_days`` out of the log; returns rows removed.
+
+    The cut is taken at the first row inside the window, so everything before it
+    goes in one range delete on the rowid; a straggler written late with an older
+    timestamp just waits for the next run.
+    """
+    cutoff = (int(time.time() if now is None else now) // DAY_SECONDS - retention_days) * DAY_SECONDS
+    db = await Database.get_instance()
+    async with db.transaction():
+        row = await db.fetchone("SELECT id FROM review_log WHERE ts >= ? ORDER BY id LIMIT 1", (cutoff,))
+        if row is None:
+            row = await db.fetchone("SELECT MAX(id) + 1 FROM review_log")
+        boundary = row[0]
+        if boundary is None:
+            return 0
+        await db.execute(
+            f"""
+            INSERT INTO review_daily (user_id, day, attempts, correct)
+            SELECT user_id, ts / {DAY_SECONDS}, COUNT(*), SUM(result != ?)
+            FROM review_log WHERE id < ? GROUP BY 1, 2
+            ON CONFLICT(user_id, day) DO UPDATE SET
+                attempts = review_daily.attempts + excluded.attempts,
+                correct = review_daily.correct + excluded.correct
+            """,
+            (int(ReviewResult.FORGOT), boundary),
+        )
+        histories = await _load_checkpoints(
+            db, "word_id IN (SELECT word_id FROM review_log WHERE id < ?)", (boundary,)
+        )
+        rows = await db.fetchall(
+            "SELECT word_id, ts, result FROM review_log WHERE id < ? ORDER BY word_id, id", (boundary,)
+        )
+        for word_id, ts, result in rows:
+            histories[word_id] = fold(histories.get(word_id, EMPTY), ts, result)
+        await db.executemany(
+            """
+            INSERT OR REPLACE INTO review_checkpoint (word_id, attempts, correct, ease, reps, interval_days, last_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (word_id, h.attempts, h.correct, h.state.ease, h.state.reps, h.state.interval_days, h.last_ts)
+                for word_id, h in histories.items()
+            ],
+        )
+        await db.execute("DELETE FROM review_log WHERE id < ?", (boundary,))
+        # checkpoints of deleted words are never replayed
+        await db.execute(
+            "DELETE FROM review_checkpoint WHERE NOT EXISTS (SELECT 1 FROM words WHERE words.id = review_checkpoint.word_id)"
+        )
+    return len(rows)
+
+
+async def replay(user_id: Optional[int] = None, reschedule: bool = True) -> int:
+    """Recompute word_stats from checkpoints and the log with the current scheduler.
+
+    Only words with history (a checkpoint or logged answers) are touched; stats from
+    before the log existed were seeded as checkpoints by migration 12. With
+    ``reschedule`` the next review day of words still being studied and answered
+    since then is recomputed from their last answer as well. Returns the number of
+    words rewritten.
+    """
+    db = await Database.get_instance()
+    # history of deleted words is skipped
+    owner, params = ("", ()) if user_id is None else (" WHERE user_id = ?", (user_id,))
+    histories = await _load_checkpoints(db, f"word_id IN (SELECT id FROM words{owner})", params)
+    logged = set()
+    async for chunk in db.iter_chunks(
+        f"SELECT word_id, ts, result FROM review_log WHERE word_id IN (SELECT id FROM words{owner}) ORDER BY word_id, id",
+        params,
+    ):
+        for word_id, ts, result in chunk:
+            histories[word_id] = fold(histories.get(word_id, EMPTY), ts, result)
+            logged.add(word_id)
+    async with db.transaction():
+        await db.executemany(
+            """
+            INSERT INTO word_stats (word_id, attempts, correct, last_seen, ease, reps, interval_days)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(word_id) DO UPDATE SET
+                attempts = excluded.attempts, correct = excluded.correct, last_seen = excluded.last_seen,
+                ease = excluded.ease, reps = excluded.reps, interval_days = excluded.interval_days
+            """,
+            [
+                (word_id, h.attempts, h.correct, _iso(h.last_ts), h.state.ease, h.state.reps, h.state.interval_days)
+                for word_id, h in histories.items()
+            ],
+        )
+        if reschedule:
+            await db.executemany(
+                "UPDATE words SET next_due_day = ? WHERE id = ? AND intervals_remaining != ?",
+                [(_due_day(histories[word_id]), word_id, srs.DONE) for word_id in logged],
+            )
+    return len(histories)
+
+
+def _iso(ts: int) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+def _due_day(history: History) -> int:
+    last = datetime.fromtimestamp(history.last_ts, timezone.utc)
+    return day_number(last) + (history.state.interval_days or srs.FIRST_INTERVAL)
+
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import heapq
+import math
+import random
+from typing import List, Optional, Sequence, TypeVar
+
+try:
+    import numpy as np  # optional: vectorizes the keys for large pools
+except ImportError:  # pragma: no cover - numpy is not a requirement
+    np = None
+
+T = TypeVar("T")
+
+# Below this many items the pure-Python path is faster than converting to arrays.
+NUMPY_MIN_ITEMS = 2048
+
+
+def weighted_sample(
+    items: Sequence[T],
+    weights: Sequence[float],
+    k: int,
+    rng: Optional[random.Random] = None,
+) -> List[T]:
+    """Pick ``k`` distinct items, each draw proportional to weight among those left.
+
+    Efraimidis–Spirakis: every item gets the key ``log(u) / w`` for a uniform ``u``
+    and the ``k`` largest keys win, in key order (the same distribution as drawing
+    one at a time). One pass plus a size-``k`` heap: O(n log k). Items with a
+    weight <= 0 only come up once every positive-weight item is taken.
+
+    Pass ``rng`` (e.g. ``random.Random(seed)``) for reproducible picks; with NumPy
+    installed, pools of NUMPY_MIN_ITEMS or more draw from a NumPy generator seeded
+    from it, so the same seed gives different picks with and without NumPy.
+    """
+    if len(items) != len(weights):
+        raise ValueError("items and weights must have the same length")
+    k = max(0, min(k, len(items)))
+    if k == 0:
+        return []
+    rng = rng or random  # the module-level functions, so random.seed() applies
+    if np is not None and len(items) >= NUMPY_MIN_ITEMS:
+        return _sample_numpy(items, weights, k, rng)
+    keys = []
+    for w in weights:
+        u = 1.0 - rng.random()  # (0, 1], so log(u) is finite
+        keys.append(math.log(u) / w if w > 0 else -math.inf)
+    top = heapq.nlargest(k, range(len(items)), key=keys.__getitem__)
+    return [items[i] for i in top]
+
+
+def _sample_numpy(items: Sequence[T], weights: Sequence[float], k: int, rng) -> List[T]:
+    gen = np.random.default_rng(rng.getrandbits(64))
+    w = np.asarray(weights, dtype=float)
+    keys = np.where(w > 0, np.log(1.0 - gen.random(len(w))) / np.where(w > 0, w, 1.0), -np.inf)
+    top = np.argpartition(-keys, k - 1)[:k]
+    top = top[np.argsort(-keys[top], kind="stable")]
+    return [items[i] for i in top.tolist()]
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+JST = timezone(timedelta(hours=9))
+
+
+def day_number(when: datetime) -> int:
+    """Return the JST calendar day of ``when`` as an integer (date ordinal)."""
+    if when.tzinfo is not None:
+        when = when.astimezone(JST)
+    return when.date().toordinal()
+
+
+def parse_day(added_at: str) -> Optional[int]:
+    """Day number of a stored ``added_at`` ISO timestamp, or None if unparsable."""
+    try:
+        return day_number(datetime.fromisoformat(added_at))
+    except Exception:
+        return None
+
+
+def day_to_date(day: int) -> date:
+    return date.fromordinal(day)
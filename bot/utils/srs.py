@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+
+from .database import Database
+from .schedule import day_number
+
+# SM-2 style scheduling. A word's spacing grows by its ease after every correct
+# review and resets after a miss; the resulting day is stored in words.next_due_day,
+# which (indexed per user) is the priority queue every due list is read from.
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MAX_EASE = 3.0
+EASE_BONUS = 0.05
+EASE_PENALTY = 0.15
+FIRST_INTERVAL = 1  # days from registration (or a miss) to the next review
+SECOND_INTERVAL = 4
+MAX_INTERVAL = 365
+# a correct answer that spaces the word out beyond this many days retires it ('done')
+RETIRE_INTERVAL = 180
+# /progress buckets: words are grouped by their current spacing in days
+PROGRESS_STAGES = (1, 4, 10, 17, 30, 60)
+# words.intervals_remaining value of words on this schedule ('done' = learned)
+ACTIVE = "sm2"
+DONE = "done"
+
+
+class ReviewState(NamedTuple):
+    reps: int  # correct reviews in a row
+    interval_days: Optional[int]  # None until the first review
+    ease: float
+
+
+NEW = ReviewState(0, None, DEFAULT_EASE)
+
+
+def first_due_day(added_day: int) -> int:
+    return added_day + FIRST_INTERVAL
+
+
+def review(state: ReviewState, correct: bool) -> ReviewState:
+    """Apply one review result and return the new state."""
+    if not correct:
+        ease = max(MIN_EASE, state.ease - EASE_PENALTY)
+        return ReviewState(0, FIRST_INTERVAL, ease)
+    ease = min(MAX_EASE, state.ease + EASE_BONUS)
+    reps = state.reps + 1
+    if reps == 1:
+        interval = FIRST_INTERVAL
+    elif reps == 2:
+        interval = SECOND_INTERVAL
+    else:
+        # round half up, as SQLite's ROUND does in stats' UPSERT
+        interval = int((state.interval_days or SECOND_INTERVAL) * ease + 0.5)
+    return ReviewState(reps, min(MAX_INTERVAL, max(1, interval)), ease)
+
+
+def stage(spacing_days: int, stages: Iterable[int] = PROGRESS_STAGES) -> int:
+    """1-based index of the largest stage not above ``spacing_days`` (0 = below the first)."""
+    return sum(1 for days in stages if spacing_days >= days)
+
+
+async def schedule_next(word_id: int, when: datetime, interval_days: Optional[int]) -> None:
+    """Store the word's next review day (learned words stay out of the queue)."""
+    db = await Database.get_instance()
+    await db.execute(
+        "UPDATE words SET next_due_day = CASE WHEN intervals_remaining = ? THEN NULL ELSE ? END WHERE id = ?",
+        (DONE, day_number(when) + (interval_days or FIRST_INTERVAL), word_id),
+    )
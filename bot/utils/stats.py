@@ -1,50 +1,186 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
+from .config import STATS_FLUSH_BATCH, STATS_FLUSH_SECONDS
 from .database import Database
+from . import review_log, srs, words
 
 
-async def record_result(word_id: int, correct: bool, when: datetime) -> None:
-    db = await Database.get_instance()
-    ts = when.isoformat()
-    row = await db.fetchone("SELECT attempts, correct, ease FROM word_stats WHERE word_id = ?", (word_id,))
-    if row is None:
-        attempts = 1
-        correct_cnt = 1 if correct else 0
-        ease = 2.5 + (0.05 if correct else -0.15)
-        ease = max(1.3, min(3.0, ease))
-        await db.execute(
-            "INSERT INTO word_stats(word_id, attempts, correct, last_seen, ease) VALUES (?, ?, ?, ?, ?)",
-            (word_id, attempts, correct_cnt, ts, ease),
-        )
+class Result(NamedTuple):
+    user_id: int
+    word_id: int
+    correct: bool
+    when: datetime
+    learned: bool = False  # the answer also retires the word (explicit, or past srs.RETIRE_INTERVAL)
+
+
+# One statement per answer: the first answer inserts the row (state from srs.review),
+# later ones apply the same SM-2 step in SQL against the row's current values, so two
+# quick answers to one word can't overwrite each other. SET expressions all see the old row.
+_NEW_EASE = f"""CASE WHEN :correct
+    THEN MIN({srs.MAX_EASE}, COALESCE(word_stats.ease, {srs.DEFAULT_EASE}) + {srs.EASE_BONUS})
+    ELSE MAX({srs.MIN_EASE}, COALESCE(word_stats.ease, {srs.DEFAULT_EASE}) - {srs.EASE_PENALTY}) END"""
+_UPSERT = f"""
+INSERT INTO word_stats (word_id, attempts, correct, last_seen, ease, reps, interval_days)
+VALUES (:word_id, 1, :correct, :ts, :ease, :reps, :interval_days)
+ON CONFLICT(word_id) DO UPDATE SET
+    attempts = COALESCE(word_stats.attempts, 0) + 1,
+    correct = COALESCE(word_stats.correct, 0) + :correct,
+    last_seen = :ts,
+    ease = {_NEW_EASE},
+    reps = CASE WHEN :correct THEN word_stats.reps + 1 ELSE 0 END,
+    interval_days = CASE
+        WHEN NOT :correct OR word_stats.reps = 0 THEN {srs.FIRST_INTERVAL}
+        WHEN word_stats.reps = 1 THEN {srs.SECOND_INTERVAL}
+        ELSE MIN({srs.MAX_INTERVAL}, MAX(1, CAST(ROUND(COALESCE(word_stats.interval_days, {srs.SECOND_INTERVAL}) * {_NEW_EASE}) AS INTEGER)))
+    END
+RETURNING interval_days
+"""
+
+
+async def apply_results(results: Sequence[Result]) -> None:
+    """Write a batch of answers in one transaction.
+
+    Each answer costs one UPSERT and one due-day update; the batch is also appended
+    to review_log. A correct answer whose next interval passes srs.RETIRE_INTERVAL
+    retires the word, as does an explicit ``learned`` result.
+    """
+    if not results:
         return
-    attempts, correct_cnt, ease = row
-    attempts += 1
-    if correct:
-        correct_cnt += 1
-        ease += 0.05
-    else:
-        ease -= 0.15
-    ease = max(1.3, min(3.0, ease))
-    await db.execute(
-        "UPDATE word_stats SET attempts = ?, correct = ?, last_seen = ?, ease = ? WHERE word_id = ?",
-        (attempts, correct_cnt, ts, ease, word_id),
-    )
-
-
-async def fetch_stats_map(user_rows) -> Dict[int, Tuple[int, int, float]]:
-    """Return map word_id -> (attempts, correct, ease)."""
     db = await Database.get_instance()
-    ids = [row[0] for row in user_rows]
-    if not ids:
-        return {}
-    # Build parameterized IN clause safely
-    placeholders = ",".join(["?"] * len(ids))
-    rows = await db.fetchall(
-        f"SELECT word_id, attempts, correct, ease FROM word_stats WHERE word_id IN ({placeholders})",
-        tuple(ids),
-    )
-    return {word_id: (attempts, correct, ease) for (word_id, attempts, correct, ease) in rows}
+    logged = []
+    async with db.transaction():
+        for r in results:
+            first = srs.review(srs.NEW, r.correct)
+            # fetchone runs on the writer inside the transaction, which is what RETURNING needs
+            row = await db.fetchone(
+                _UPSERT,
+                {
+                    "word_id": r.word_id,
+                    "correct": 1 if r.correct else 0,
+                    "ts": r.when.isoformat(),
+                    "ease": first.ease,
+                    "reps": first.reps,
+                    "interval_days": first.interval_days,
+                },
+            )
+            if r.learned or (r.correct and row[0] > srs.RETIRE_INTERVAL):
+                await db.execute(
+                    "UPDATE words SET intervals_remaining = ?, next_due_day = NULL WHERE id = ? AND user_id = ?",
+                    (srs.DONE, r.word_id, r.user_id),
+                )
+                r = r._replace(learned=True)
+            else:
+                await srs.schedule_next(r.word_id, r.when, row[0])
+            logged.append(r)
+        await review_log.append(review_log.rows_for(logged))
+
+
+class StatsBuffer:
+    """Write-behind buffer for review answers.
+
+    Button callbacks ``add`` a result and return at once; pending results are
+    written together by ``apply_results`` after ``STATS_FLUSH_SECONDS``, as soon as
+    ``STATS_FLUSH_BATCH`` are waiting, or when a session ends (``request_flush``).
+    A failed flush keeps its results and tries again on the next timer.
+    """
+
+    _instance = None
+
+    def __init__(self, flush_seconds: float = STATS_FLUSH_SECONDS, max_pending: int = STATS_FLUSH_BATCH):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: List[Result] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def get_instance() -> "StatsBuffer":
+        if StatsBuffer._instance is None:
+            StatsBuffer._instance = StatsBuffer()
+        return StatsBuffer._instance
 
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, user_id: int, word_id: int, correct: bool, when: datetime, learned: bool = False) -> None:
+        self._pending.append(Result(user_id, word_id, correct, when, learned))
+        self.request_flush(0 if len(self._pending) >= self.max_pending else self.flush_seconds)
+
+    def request_flush(self, delay: float = 0.0) -> None:
+        """Flush after ``delay`` seconds; an earlier request replaces a later pending timer."""
+        if self._timer is not None and not self._timer.done():
+            if delay > 0:
+                return
+            self._timer.cancel()
+        self._timer = asyncio.create_task(self._flush_after(delay))
+
+    async def _flush_after(self, delay: float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # a replacing request may cancel the timer, but never a flush already under way
+        await asyncio.shield(self.flush())
+        # results added while it ran, or kept by a failed write, get the next timer
+        if self._pending:
+            self._timer = asyncio.create_task(self._flush_after(self.flush_seconds))
+
+    async def flush(self) -> int:
+        """Write every pending result now; returns how many were written."""
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                await apply_results(batch)
+            except Exception as e:
+                logging.error(f"Failed to write {len(batch)} review result(s); keeping them for the next flush: {e}")
+                self._pending[:0] = batch
+                if self._timer is None or self._timer.done():
+                    # direct flush() call with no timer around (a timer re-arms itself)
+                    self._timer = asyncio.create_task(self._flush_after(self.flush_seconds))
+                return 0
+            logging.debug(f"Flushed {len(batch)} review result(s)")
+            return len(batch)
+
+
+def get_stats_buffer() -> StatsBuffer:
+    return StatsBuffer.get_instance()
+
+
+def difficulty_weight(entry: Optional[Tuple[int, int, float]], bias: float = 1.0) -> float:
+    """Quiz weight of a word from its (attempts, correct, ease): misses and low ease weigh more."""
+    attempts, corrects, ease = entry or (0, 0, srs.DEFAULT_EASE)
+    acc = (corrects / attempts) if attempts else 0.0
+    return 1.0 + bias * (attempts * (1.0 - acc) + (srs.MAX_EASE - ease))
+
+
+async def fetch_words_with_stats(
+    user_id: int,
+) -> Tuple[List[Tuple[int, str, str]], Dict[int, Tuple[int, int, float]]]:
+    """Return the user's words as (id, word, meaning) in id order, plus map word_id -> (attempts, correct, ease).
+
+    The word list comes from the per-user cache in ``words``; the stats are read
+    fresh with one ``word_stats JOIN words`` query on the (user_id, id) index, in
+    chunks. As before, words never answered are absent from the map.
+    """
+    rows = await words.fetch_user_words(user_id)
+    pool = [(word_id, word, meaning) for (word_id, word, meaning, _) in rows]
+    if not pool:
+        return pool, {}
+    db = await Database.get_instance()
+    stats_map: Dict[int, Tuple[int, int, float]] = {}
+    async for chunk in db.iter_chunks(
+        """
+        SELECT s.word_id, s.attempts, s.correct, s.ease
+        FROM words w JOIN word_stats s ON s.word_id = w.id
+        WHERE w.user_id = ?
+        """,
+        (user_id,),
+    ):
+        for word_id, attempts, correct, ease in chunk:
+            stats_map[word_id] = (attempts, correct, ease)
+    return pool, stats_map
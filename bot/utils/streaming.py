@@ -0,0 +1,84 @@
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, List
+
+from .config import STREAM_EDIT_EVERY_CHARS, STREAM_EDIT_INTERVAL_MS
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+
+def split_message(text: str, limit: int = DISCORD_MESSAGE_LIMIT) -> List[str]:
+    """Split text into Discord-sized pieces, preferring line breaks."""
+    pieces: List[str] = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        pieces.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text or not pieces:
+        pieces.append(text)
+    return pieces
+
+
+class ProgressiveEditor:
+    """Shows a streamed generation by repeatedly editing one message.
+
+    ``edit`` is called with the text so far (e.g. ``interaction.edit_original_response``).
+    The first chunk is shown immediately; afterwards edits happen at most every
+    ``interval`` seconds unless ``every_chars`` new characters have piled up.
+    """
+
+    def __init__(
+        self,
+        edit: Callable[..., Awaitable],
+        send: Callable[..., Awaitable] = None,
+        interval: float = STREAM_EDIT_INTERVAL_MS / 1000,
+        every_chars: int = STREAM_EDIT_EVERY_CHARS,
+    ):
+        self._edit = edit
+        self._send = send
+        self.interval = interval
+        self.every_chars = every_chars
+        self._last_edit = 0.0
+        self._shown_len = 0
+        self._edits_enabled = True
+        self.edits = 0
+
+    async def _show(self, content: str) -> None:
+        try:
+            await self._edit(content=content)
+            self.edits += 1
+        except Exception as e:
+            # Keep consuming the stream; the final text is still delivered by finish().
+            logging.warning(f"Progressive edit failed; waiting for the final text: {e}")
+            self._edits_enabled = False
+
+    async def update(self, text: str) -> None:
+        if not self._edits_enabled or not text.strip():
+            return
+        now = time.monotonic()
+        pending = len(text) - self._shown_len
+        first = self._shown_len == 0
+        if not (first or now - self._last_edit >= self.interval or pending >= self.every_chars):
+            return
+        preview = text if len(text) <= DISCORD_MESSAGE_LIMIT - 2 else text[: DISCORD_MESSAGE_LIMIT - 2]
+        await self._show(preview + " …")
+        self._last_edit = now
+        self._shown_len = len(text)
+
+    async def consume(self, chunks: AsyncIterator[str]) -> str:
+        """Drain ``chunks``, editing along the way; returns the full text."""
+        parts: List[str] = []
+        async for chunk in chunks:
+            parts.append(chunk)
+            await self.update("".join(parts))
+        return "".join(parts)
+
+    async def finish(self, text: str) -> None:
+        """Replace the preview with the final text; overflow goes out via ``send``."""
+        first, *rest = split_message(text)
+        await self._edit(content=first)
+        for piece in rest:
+            if self._send is not None:
+                await self._send(piece)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import re
+import time
+from typing import Optional, Set, Tuple
+
+import pytz
+
+from .database import Database
+
+# Users without an explicit choice keep the original schedule: 21:00 JST.
+DEFAULT_TIMEZONE = "Asia/Tokyo"
+DEFAULT_REMIND_MINUTE = 21 * 60
+# The "no words registered today" nudge goes out this long after the daily reminder.
+INACTIVE_DELAY_MINUTES = 60
+
+# Every (timezone, remind_minute) pair with at least one user; the scheduler only
+# queries slots found here. Loaded lazily (one DISTINCT over idx_user_settings_slot) and
+# dropped when a setting changes in this process. Other bot processes change
+# settings too, so the set is also reloaded every SLOTS_TTL_SECONDS.
+SLOTS_TTL_SECONDS = 30.0
+_slots: Optional[Set[Tuple[str, int]]] = None
+_slots_loaded_at = 0.0
+
+
+def parse_time(text: str) -> Optional[int]:
+    """Parse "HH:MM" (or "HH") into minutes after midnight; None if invalid."""
+    m = re.match(r"^\s*(\d{1,2})(?:[:：](\d{2}))?\s*$", text or "")
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def format_minute(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def resolve_timezone(name: str) -> Optional[str]:
+    """Return the canonical IANA name for ``name`` (case-insensitive), or None."""
+    name = (name or "").strip()
+    if name in pytz.all_timezones_set:
+        return name
+    lowered = name.lower()
+    for candidate in pytz.all_timezones:
+        if candidate.lower() == lowered:
+            return candidate
+    return None
+
+
+async def get(user_id: int) -> Tuple[str, int]:
+    """(timezone, remind_minute) for a user, falling back to the defaults."""
+    db = await Database.get_instance()
+    row = await db.fetchone("SELECT timezone, remind_minute FROM user_settings WHERE user_id = ?", (user_id,))
+    return (row[0], row[1]) if row else (DEFAULT_TIMEZONE, DEFAULT_REMIND_MINUTE)
+
+
+async def update(user_id: int, timezone: Optional[str] = None, remind_minute: Optional[int] = None) -> Tuple[str, int]:
+    """Change a user's timezone and/or reminder time; returns the new settings."""
+    global _slots
+    current_tz, current_minute = await get(user_id)
+    timezone = timezone or current_tz
+    remind_minute = current_minute if remind_minute is None else remind_minute
+    db = await Database.get_instance()
+    await db.execute(
+        """
+        INSERT INTO user_settings (user_id, timezone, remind_minute, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            timezone = excluded.timezone,
+            remind_minute = excluded.remind_minute,
+            updated_at = excluded.updated_at
+        """,
+        (user_id, timezone, remind_minute, time.time()),
+    )
+    _slots = None
+    return timezone, remind_minute
+
+
+async def ensure(user_id: int) -> None:
+    """Give a newly seen user the default settings (no-op for known users)."""
+    db = await Database.get_instance()
+    cursor = await db.execute("INSERT OR IGNORE INTO user_settings (user_id) VALUES (?)", (user_id,))
+    if cursor.rowcount and _slots is not None:
+        _slots.add((DEFAULT_TIMEZONE, DEFAULT_REMIND_MINUTE))
+
+
+async def slots() -> Set[Tuple[str, int]]:
+    global _slots, _slots_loaded_at
+    if _slots is None or time.monotonic() - _slots_loaded_at > SLOTS_TTL_SECONDS:
+        db = await Database.get_instance()
+        rows = await db.fetchall("SELECT DISTINCT timezone, remind_minute FROM user_settings")
+        _slots = {(tz, minute) for tz, minute in rows}
+        _slots_loaded_at = time.monotonic()
+    return _slots
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Iterable, List, Tuple
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
 import re
 
+from .config import DB_ITER_CHUNK_SIZE, WORD_CACHE_MAX_USER_WORDS, WORD_CACHE_SIZE, WORD_CACHE_TTL_SECONDS
 from .database import Database
-
-DEFAULT_INTERVALS = [1, 4, 10, 17, 30, 60]
+from .lru import LRUCache
+from . import activity, user_settings
+from . import srs
+from .schedule import day_number
 
 
 def parse_pairs(text: str) -> List[Tuple[str, str]]:
@@ -35,72 +38,185 @@ def parse_pairs(text: str) -> List[Tuple[str, str]]:
     return pairs
 
 
-async def insert_pairs(user_id: int, pairs: Iterable[Tuple[str, str]], added_at: datetime, intervals: Iterable[int] = DEFAULT_INTERVALS) -> int:
-    """Insert pairs for a user; returns count inserted."""
+async def insert_pairs(user_id: int, pairs: Iterable[Tuple[str, str]], added_at: datetime) -> List[int]:
+    """Insert pairs for a user in one transaction; returns the new word ids in input order.
+
+    The user's settings row and user_activity are written in the same transaction,
+    so they can't drift from ``words``.
+    """
     db = await Database.get_instance()
-    count = 0
-    intervals_remaining = ",".join(map(str, list(intervals)[:5]))  # keep alignment with existing schema
     ts = added_at.isoformat()
-    for word, meaning in pairs:
-        await db.execute(
-            """
-            INSERT INTO words (user_id, word, meaning, added_at, intervals_remaining)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (user_id, word, meaning, ts, intervals_remaining),
+    next_due = srs.first_due_day(day_number(added_at))
+    async with db.transaction():
+        await user_settings.ensure(user_id)
+        ids = await db.insert_many(
+            "words",
+            ("user_id", "word", "meaning", "added_at", "intervals_remaining", "next_due_day"),
+            [(user_id, word, meaning, ts, srs.ACTIVE, next_due) for word, meaning in pairs],
         )
-        count += 1
-    return count
+        await activity.record_added(user_id, len(ids), added_at)
+    invalidate_user(user_id)
+    return ids
+
+
+# Read-through cache of each user's (id, word, meaning, added_at) list. Every path
+# that adds, edits or deletes a user's words calls ``invalidate_user`` once its
+# writes are committed; review results only touch scheduling columns and keep it.
+_user_words: LRUCache[tuple] = LRUCache(maxsize=WORD_CACHE_SIZE, ttl=WORD_CACHE_TTL_SECONDS or None)
+# Bumped by every invalidation so a read that raced a write is not stored.
+_generation = 0
+
+
+def invalidate_user(user_id: int) -> None:
+    global _generation
+    _generation += 1
+    _user_words.pop(user_id)
+
 
+async def fetch_user_words(user_id: int) -> Tuple[Tuple[int, str, str, str], ...]:
+    """The user's words as (id, word, meaning, added_at) in id order.
 
-async def fetch_user_words(user_id: int):
+    The tuple may be shared with other callers through the cache; don't mutate it.
+    """
+    rows = _user_words.get(user_id)
+    if rows is not None:
+        return rows
+    generation = _generation
+    db = await Database.get_instance()
+    rows = tuple(
+        await db.fetchall(
+            "SELECT id, word, meaning, added_at FROM words WHERE user_id = ? ORDER BY id ASC",
+            (user_id,),
+        )
+    )
+    if generation == _generation and len(rows) <= WORD_CACHE_MAX_USER_WORDS:
+        _user_words.set(user_id, rows)
+    return rows
+
+
+
+async def fetch_words_by_ids(user_id: int, word_ids: Iterable[int]) -> List[Tuple[int, str, str]]:
+    """(id, word, meaning) for the given ids that still belong to the user."""
+    word_ids = list(word_ids)
+    if not word_ids:
+        return []
     db = await Database.get_instance()
     return await db.fetchall(
-        "SELECT id, word, meaning, added_at FROM words WHERE user_id = ? ORDER BY id ASC",
-        (user_id,),
+        f"SELECT id, word, meaning FROM words WHERE user_id = ? AND id IN ({','.join('?' * len(word_ids))}) ORDER BY id ASC",
+        (user_id, *word_ids),
     )
 
 
-def compute_due_today(rows, now: datetime, intervals: Iterable[int] = DEFAULT_INTERVALS):
-    """Return list of words due today based on days since added."""
-    intervals_set = set(intervals)
-    due = []
-    for _id, word, meaning, added_at in rows:
-        try:
-            added_time = datetime.fromisoformat(added_at)
-        except Exception:
-            continue
-        days = (now.date() - added_time.date()).days
-        if days in intervals_set:
-            due.append((_id, word, meaning))
-    return due
+async def fetch_due_words(user_id: int, now: datetime) -> List[Tuple[int, str, str]]:
+    """Words whose next review day is today or earlier, most overdue first, as (id, word, meaning)."""
+    db = await Database.get_instance()
+    return await db.fetchall(
+        "SELECT id, word, meaning FROM words WHERE user_id = ? AND next_due_day <= ? ORDER BY next_due_day, id",
+        (user_id, day_number(now)),
+    )
+
+
+async def iter_due_words_by_user(
+    now: datetime,
+    timezone: Optional[str] = None,
+    remind_minute: Optional[int] = None,
+    partition_sql: Tuple[str, tuple] = ("", ()),
+    chunk_size: int = DB_ITER_CHUNK_SIZE,
+) -> AsyncIterator[Tuple[int, List[Tuple[int, str, str]]]]:
+    """Stream (user_id, [(id, word, meaning), ...]) for every user with words due.
+
+    Rows are read in pages of ``chunk_size`` ordered by user, so memory stays bounded
+    by the page size plus one user's words and the first user is ready immediately.
+    Each page is a separate keyset query on (user_id, next_due_day, id), so no read
+    connection is held while the caller works on a user (the fan-out reads the DM
+    channel cache from the same pool). With ``timezone`` and ``remind_minute`` only
+    the users of that reminder slot are read; "today" is always the JST day of
+    ``now``, the basis due days are stored in. ``partition_sql`` (from
+    ``leases.partition_filter`` on ``s.user_id``) narrows it to some partitions.
+    """
+    db = await Database.get_instance()
+    today = day_number(now)
+    if timezone is None:
+        # The unary + keeps the planner on idx_words_next_due (range scan over due
+        # words) instead of walking idx_words_user_id just to avoid the sort.
+        query = """
+            SELECT user_id, next_due_day, id, word, meaning FROM words
+            WHERE next_due_day <= ? AND (user_id, next_due_day, id) > (?, ?, ?)
+            ORDER BY +user_id, next_due_day, id LIMIT ?
+            """
+        params: tuple = (today,)
+    else:
+        # next_due_day is always a JST day number (schedule.day_number), as in fetch_due_words,
+        # so the slot compares against the JST day of its instant, not the user's local date
+        partition_clause, partition_params = partition_sql
+        query = f"""
+            SELECT w.user_id, w.next_due_day, w.id, w.word, w.meaning
+            FROM user_settings s JOIN words w ON w.user_id = s.user_id
+            WHERE s.timezone = ? AND s.remind_minute = ? AND w.next_due_day <= ?{partition_clause}
+              AND (w.user_id, w.next_due_day, w.id) > (?, ?, ?)
+            ORDER BY s.user_id, w.next_due_day, w.id LIMIT ?
+            """
+        params = (timezone, remind_minute, today, *partition_params)
+    cursor = (-1, -1, -1)
+    current_user = None
+    items: List[Tuple[int, str, str]] = []
+    while True:
+        rows = await db.fetchall(query, (*params, *cursor, chunk_size))
+        for user_id, _, word_id, word, meaning in rows:
+            if user_id != current_user:
+                if items:
+                    yield current_user, items
+                current_user, items = user_id, []
+            items.append((word_id, word, meaning))
+        if len(rows) < chunk_size:
+            break
+        cursor = rows[-1][:3]
+    if items:
+        yield current_user, items
+
+
+async def fetch_schedule_rows(user_id: int):
+    """(id, added_at, intervals_remaining, next_due_day, interval_days) for every word of a user."""
+    db = await Database.get_instance()
+    return await db.fetchall(
+        """
+        SELECT w.id, w.added_at, w.intervals_remaining, w.next_due_day, s.interval_days
+        FROM words w LEFT JOIN word_stats s ON s.word_id = w.id
+        WHERE w.user_id = ?
+        ORDER BY w.id
+        """,
+        (user_id,),
+    )
 
 
-def compute_progress(rows, now: datetime, intervals: Iterable[int] = DEFAULT_INTERVALS):
-    """Compute simple progress summary for a user.
+def compute_progress(rows, now: datetime, stages: Iterable[int] = srs.PROGRESS_STAGES):
+    """Compute a progress summary from ``fetch_schedule_rows`` rows.
 
-    Returns dict with total, due_today, stage_counts.
-    stage is max index where interval <= days since added, clamped to [0..len(intervals)].
+    Returns dict with total, due_today, stage_counts and intervals. A word's stage
+    is the largest of ``stages`` not above its current spacing: the interval the
+    scheduler gave it, or its age for words never reviewed. Learned words go to the
+    final bucket.
     """
-    ints = list(intervals)
-    total = len(rows)
-    due_today = len(compute_due_today(rows, now, intervals=ints))
-    stage_counts = [0] * (len(ints) + 1)  # final bucket = beyond last interval
-    for _id, word, meaning, added_at in rows:
-        try:
-            added_time = datetime.fromisoformat(added_at)
-        except Exception:
+    stages = list(stages)
+    today = day_number(now)
+    stage_counts = [0] * (len(stages) + 2)  # [below the first stage, each stage..., learned]
+    due_today = 0
+    for _id, added_at, intervals_remaining, next_due_day, interval_days in rows:
+        if intervals_remaining == srs.DONE:
+            stage_counts[-1] += 1
             continue
-        days = (now.date() - added_time.date()).days
-        stage = 0
-        for idx, iv in enumerate(ints, start=1):
-            if days >= iv:
-                stage = idx
-        stage_counts[stage] += 1
+        if next_due_day is not None and next_due_day <= today:
+            due_today += 1
+        spacing = interval_days
+        if spacing is None:
+            try:
+                spacing = (now.date() - datetime.fromisoformat(added_at).date()).days
+            except Exception:
+                spacing = 0
+        stage_counts[srs.stage(spacing, stages)] += 1
     return {
-        "total": total,
+        "total": len(rows),
         "due_today": due_today,
         "stage_counts": stage_counts,
-        "intervals": ints,
+        "intervals": stages,
     }
-
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def run_db(tmp_path, monkeypatch):
+    """Point the Database singleton at a throwaway file.
+
+    Returns ``run(coro_fn)``, which runs ``coro_fn()`` with the open Database and
+    closes it on the same event loop.
+    """
+    import bot.utils.database as database
+
+    monkeypatch.setattr(database, "DATABASE", str(tmp_path / "words.db"))
+    monkeypatch.setattr(database.Database, "_lock", None)
+
+    def run(coro_fn):
+        async def main():
+            db = await database.Database.get_instance()
+            try:
+                return await coro_fn(db)
+            finally:
+                await db.close()
+
+        return asyncio.run(main())
+
+    run.module = database
+    yield run
+    database.Database._instance = None
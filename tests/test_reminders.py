@@ -0,0 +1,29 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+
+def test_daily_fanout_with_one_reader(run_db, monkeypatch):
+    """The due-word stream must not hold the only reader while the fan-out reads DM channels."""
+    monkeypatch.setattr(run_db.module, "DB_READ_POOL_SIZE", 1)
+    from bot.cogs.reminders import Reminders
+    from bot.tools.simulate_reminders import JST, FakeDiscord, seed
+    from bot.utils import dm_channels, user_settings
+    from bot.utils.fanout import DMFanout
+
+    async def run(db):
+        # more due rows than one page, so the stream has to come back for the rest
+        await seed(db, 150, 5, 1.0, 0.0, random.Random(1))
+        dm_channels._memory.clear()
+        client = FakeDiscord(0.0, 0.0, 0.0, 0.0, 1)
+        DMFanout._instance = DMFanout(client, rate=10000)
+        cog = Reminders(client)
+        now = JST.localize(datetime.combine(datetime.now(JST).date(), datetime.min.time())) + timedelta(
+            minutes=user_settings.DEFAULT_REMIND_MINUTE
+        )
+        return await asyncio.wait_for(
+            cog._run_daily_reminder_once(now, "Asia/Tokyo", user_settings.DEFAULT_REMIND_MINUTE), timeout=10
+        )
+
+    sent, words = run_db(run)
+    assert (sent, words) == (150, 750)
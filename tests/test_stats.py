@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+
+def test_correct_answers_follow_sm2_intervals(run_db):
+    from bot.utils import srs, stats
+    from bot.utils.schedule import day_number
+
+    start = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    day = day_number(start)
+
+    async def run(db):
+        await db.execute(
+            "INSERT INTO words (id, user_id, word, meaning, added_at, intervals_remaining, next_due_day) "
+            "VALUES (1, 7, 'apple', 'りんご', ?, ?, ?)",
+            (start.isoformat(), srs.ACTIVE, day),
+        )
+        due = []
+        for when in (start, start + timedelta(days=srs.FIRST_INTERVAL)):
+            await stats.apply_results([stats.Result(7, 1, True, when)])
+            due.append(await db.fetchone("SELECT next_due_day, intervals_remaining FROM words WHERE id = 1"))
+        return due
+
+    first, second = run_db(run)
+    assert first == (day + srs.FIRST_INTERVAL, srs.ACTIVE)
+    assert second == (day + srs.FIRST_INTERVAL + srs.SECOND_INTERVAL, srs.ACTIVE)
+
+
+def test_correct_answer_past_retire_interval_retires(run_db):
+    from bot.utils import srs, stats
+    from bot.utils.review_log import ReviewResult
+
+    when = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+    async def run(db):
+        await db.execute(
+            "INSERT INTO words (id, user_id, word, meaning, added_at, intervals_remaining, next_due_day) "
+            "VALUES (1, 7, 'apple', 'りんご', ?, ?, 0)",
+            (when.isoformat(), srs.ACTIVE),
+        )
+        await db.execute(
+            "INSERT INTO word_stats (word_id, attempts, correct, ease, reps, interval_days) VALUES (1, 5, 5, ?, 5, ?)",
+            (srs.MAX_EASE, srs.RETIRE_INTERVAL),
+        )
+        await stats.apply_results([stats.Result(7, 1, True, when)])
+        word = await db.fetchone("SELECT next_due_day, intervals_remaining FROM words WHERE id = 1")
+        logged = await db.fetchone("SELECT result FROM review_log WHERE word_id = 1")
+        return word, logged
+
+    word, logged = run_db(run)
+    assert word == (None, srs.DONE)
+    assert logged == (ReviewResult.LEARNED,)